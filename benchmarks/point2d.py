@@ -0,0 +1,103 @@
+import math
+import sys
+import timeit
+
+from src.point2d import Point2D
+from src.scanner import Scanner
+
+
+class OriginalPoint2D():
+    # the point type before it was slotted, kept to measure the difference
+    @staticmethod
+    def avg(a, b):
+        return OriginalPoint2D((a.x + b.x)/2, (a.y + b.y)/2)
+
+    @staticmethod
+    def dist(p1, p2):
+        return math.hypot(p1.x - p2.x, p1.y - p2.y)
+
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def __getitem__(self, index):
+        match index:
+            case 0:
+                return self.x
+            case 1:
+                return self.y
+            case _:
+                raise Exception("Bad index")
+
+    def rotated(self, origin, angle):
+        x = origin.x + math.cos(angle) * (self.x - origin.x) - math.sin(angle) * (self.y - origin.y)
+        y = origin.y + math.sin(angle) * (self.x - origin.x) + math.cos(angle) * (self.y - origin.y)
+        return OriginalPoint2D(x, y)
+
+    def translated(self, vector):
+        x = self.x + vector.x
+        y = self.y + vector.y
+        return OriginalPoint2D(x, y)
+
+    polar_angle = Point2D.polar_angle
+    points_on_circle = Point2D.points_on_circle
+
+
+def measure(function, number):
+    return timeit.timeit(function, number=number) / number
+
+
+def use_point_type(point_type):
+    # every module of the geometry core refers to the point type by name
+    for module in list(sys.modules.values()):
+        if module is not None and module.__name__.startswith("src.") and hasattr(module, "Point2D"):
+            module.Point2D = point_type
+
+
+def format_time(seconds):
+    return f"{seconds * 1e9:.0f} ns" if seconds < 1e-4 else f"{seconds * 1000:.2f} ms"
+
+
+def main(scanner_file_path="scanners/benchmark.json"):
+    scanner = Scanner()
+    scanner.configure_from_file(scanner_file_path)
+
+    def calculate():
+        # the array keeps its cards until something changes, every run has to fit them again
+        scanner.array.invalidate()
+        scanner.calculate_array("bisection")
+
+    def benchmarks(point_type):
+        p = point_type(1.0, 2.0)
+        origin = point_type(0.5, 0.5)
+        return {
+            "Point2D()": (lambda: point_type(1.0, 2.0), 200000),
+            "Point2D.avg": (lambda: point_type.avg(p, origin), 200000),
+            "Point2D.rotated": (lambda: p.rotated(origin, 0.3), 200000),
+            "Point2D[1]": (lambda: p[1], 200000),
+            "attribute access": (lambda: p.x + p.y, 200000),
+            f"bisection on {scanner_file_path}": (calculate, 20),
+        }
+
+    point_types = {"original": OriginalPoint2D, "current": Point2D}
+    results = {name: {} for name in point_types}
+    # both types are measured in turn, so that a slower phase of the machine affects both of them
+    for _ in range(5):
+        for name, point_type in point_types.items():
+            use_point_type(point_type)
+            try:
+                for label, (function, number) in benchmarks(point_type).items():
+                    best = results[name].get(label, float("inf"))
+                    results[name][label] = min(best, measure(function, number))
+            finally:
+                use_point_type(Point2D)
+
+    width = max(len(label) for label in results["current"])
+    print(f"{'':<{width}} {'original':>10} {'current':>10} {'ratio':>6}")
+    for label, current in results["current"].items():
+        original = results["original"][label]
+        print(f"{label:<{width}} {format_time(original):>10} {format_time(current):>10} {original / current:>6.2f}")
+
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
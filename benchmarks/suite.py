@@ -0,0 +1,253 @@
+import argparse
+import glob
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from src.arrays import Array
+from src.scanner import Scanner
+
+SIMULATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulation")
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def recalculate(scanner, calculate, engine):
+    def run():
+        scanner.array.invalidate()
+        calculate(scanner.tube.focal_spot, engine)
+    return run
+
+
+@benchmark("calculate")
+def bench_calculate(scanner, workdir):
+    if scanner.array.mode != "compact":
+        return
+    for engine in Array.engines:
+        yield {"engine": engine}, recalculate(scanner, scanner.array.calculate, engine)
+
+
+@benchmark("calculate_arch")
+def bench_calculate_arch(scanner, workdir):
+    if scanner.array.mode != "arc":
+        return
+    for engine in Array.engines:
+        yield {"engine": engine}, recalculate(scanner, scanner.array.calculate_arch, engine)
+
+
+@benchmark("export")
+def bench_export(scanner, workdir):
+    yield {}, lambda: scanner.array.export(scanner.tube.focal_spot)
+
+
+@benchmark("export_simulation_input")
+def bench_export_simulation_input(scanner, workdir):
+    filename = os.path.join(workdir, "scene.json")
+    yield {}, lambda: scanner.export_simulation_input(filename)
+
+
+@benchmark("render")
+def bench_render(scanner, workdir):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+    from src.renderer import ScannerRenderer
+
+    def draw(figure, renderer):
+        figure.axes[0].set_xlim(scanner.case_offset_x, scanner.case_offset_x + scanner.case_size_x)
+        figure.axes[0].set_ylim(scanner.case_offset_z, scanner.case_offset_z + scanner.case_size_z)
+        renderer.update(scanner)
+        figure.canvas.draw()
+
+    def create():
+        figure = Figure(figsize=(12, 9))
+        FigureCanvasAgg(figure)
+        ax = figure.add_subplot(111)
+        ax.set_aspect('equal')
+        renderer = ScannerRenderer(ax)
+        draw(figure, renderer)
+        return figure, renderer
+
+    figure, renderer = create()
+    yield {"phase": "create"}, create
+    yield {"phase": "update"}, lambda: draw(figure, renderer)
+
+
+@benchmark("simulation")
+def bench_simulation(scanner, workdir):
+    if SIMULATION_DIR not in sys.path:
+        sys.path.append(SIMULATION_DIR)
+    import numpy as np
+    import sim
+
+    filename = os.path.join(workdir, "scene.json")
+    scanner.export_simulation_input(filename)
+    scene = sim.load_config(filename)
+    settings = sim.load_config(os.path.join(SIMULATION_DIR, "config.json"))
+    resolution = settings["detector_resolution"]
+
+    _, geometries = sim.generate_scene(scene["sphere"], with_meshes=False)
+    focal_spot = np.array([scene["focal_spot"]["center"][0], 0.0, scene["focal_spot"]["center"][1]])
+    detector_points = sim.sample_detector_points(scene["detectors"], resolution)
+
+    yield {"kernel": "sample_detector_points"}, lambda: sim.sample_detector_points(scene["detectors"], resolution)
+    yield {"kernel": "calculate_occlusion"}, lambda: sim.calculate_occlusion(scene["detectors"], detector_points,
+                                                                             resolution, focal_spot)
+    for precision, dtype in sim.PRECISIONS.items():
+        cast_geometries = [geometry.astype(dtype) for geometry in geometries]
+        args = (cast_geometries, 0, focal_spot, detector_points, 0.0, dtype)
+        yield {"kernel": "process_row", "precision": precision}, lambda args=args: sim.process_row(args)
+
+
+def measure(function, min_time, repeat):
+    # the first call pays for lazy imports and caches, it is not measured
+    function()
+
+    # like timeit.Timer.autorange, but with a shorter target so that the whole suite runs in minutes
+    number = 1
+    while True:
+        t0 = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - t0
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(int(min_time / elapsed) + 1, 10))
+
+    times = [elapsed / number]
+    for _ in range(repeat - 1):
+        t0 = time.perf_counter()
+        for _ in range(number):
+            function()
+        times.append((time.perf_counter() - t0) / number)
+
+    return {
+        "number": number,
+        "repeat": repeat,
+        "best": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.mean(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+    }
+
+
+def metadata():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    import matplotlib
+    import numpy
+
+    return {
+        "commit": commit,
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "numpy": numpy.__version__,
+        "matplotlib": matplotlib.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def format_params(params):
+    return ",".join(f"{key}={value}" for key, value in params.items())
+
+
+def run(scanner_file_paths, names, min_time, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for scanner_file_path in scanner_file_paths:
+            for name in names:
+                scanner = Scanner()
+                scanner.configure_from_file(scanner_file_path)
+                scanner.calculate_array()
+                try:
+                    cases = list(BENCHMARKS[name](scanner, workdir) or [])
+                except ImportError as e:
+                    print(f"{name} skipped: {e}", file=sys.stderr)
+                    continue
+
+                for params, function in cases:
+                    result = {"name": name, "scanner": scanner_file_path, "params": params}
+                    result.update(measure(function, min_time, repeat))
+                    results.append(result)
+                    print(f"{name:<24} {os.path.basename(scanner_file_path):<16} {format_params(params):<36} "
+                          f"{format_time(result['median']):>12}", file=sys.stderr)
+    return results
+
+
+def result_key(result):
+    return result["name"], os.path.basename(result["scanner"]), format_params(result["params"])
+
+
+def compare(base_file_path, new_file_path, threshold):
+    with open(base_file_path) as f:
+        base = {result_key(result): result for result in json.load(f)["results"]}
+    with open(new_file_path) as f:
+        new = json.load(f)["results"]
+
+    regressions = 0
+    for result in new:
+        key = result_key(result)
+        if key not in base:
+            continue
+        # the best time is the least affected by other processes, as in timeit
+        ratio = result["best"] / base[key]["best"]
+        regressed = ratio > threshold
+        regressions += regressed
+        print(f"{key[0]:<24} {key[1]:<16} {key[2]:<36} {format_time(base[key]['best']):>12} "
+              f"{format_time(result['best']):>12} {ratio:6.2f}x{'  REGRESSION' if regressed else ''}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite for XArray Constructor")
+    parser.add_argument("scanners", nargs="*", default=["scanners/*.json"], help="Scanner configuration files or glob patterns")
+    parser.add_argument("--benchmark", "-b", action="append", choices=list(BENCHMARKS),
+                        help="Benchmark to run, can be given many times (default: all)")
+    parser.add_argument("--output", "-o", default=None, help="Save the results to this JSON file")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Minimum time of a single measurement in seconds")
+    parser.add_argument("--repeat", type=int, default=5, help="Number of measurements of every benchmark")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), default=None,
+                        help="Compare two result files instead of running the benchmarks")
+    parser.add_argument("--threshold", type=float, default=1.2,
+                        help="Ratio of the best times above which --compare reports a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, args.threshold)
+
+    scanner_file_paths = sorted({path for pattern in args.scanners for path in glob.glob(pattern)})
+    results = run(scanner_file_paths, args.benchmark or list(BENCHMARKS), args.min_time, args.repeat)
+
+    report = {"metadata": metadata(), "results": results}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=4)
+    else:
+        json.dump(report, sys.stdout, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
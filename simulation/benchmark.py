@@ -0,0 +1,79 @@
+import sys
+import time
+import numpy as np
+
+from sim import (load_config, SphereGeometry, sample_detector_points, process_row, process_row_per_ray,
+                 calculate_occlusion, calculate_occlusion_per_pixel, PRECISIONS)
+
+def measure(function, args):
+    t0 = time.perf_counter()
+    result = function(args)
+    return result, time.perf_counter() - t0
+
+def main():
+    if len(sys.argv) < 3:
+        print("Usage: python benchmark.py <scene.json> <config.json> [rows]")
+        sys.exit(1)
+
+    scene_config = load_config(sys.argv[1])
+    settings_config = load_config(sys.argv[2])
+    checked_rows = int(sys.argv[3]) if len(sys.argv) > 3 else 3
+
+    sphere = scene_config["sphere"]
+    geometries = [SphereGeometry(np.array([sphere["center"][0], 0, sphere["center"][1]]), sphere["radius"])]
+    focal_spot = np.array([scene_config["focal_spot"]["center"][0], 0.0, scene_config["focal_spot"]["center"][1]])
+
+    detector_points = sample_detector_points(scene_config["detectors"], settings_config["detector_resolution"])
+    length = settings_config["detector_length"]
+    length_points = np.linspace(-length / 2, length / 2, settings_config["roll_axis_resolution"])
+
+    checked = np.linspace(0, len(length_points) - 1, checked_rows).astype(int)
+    per_ray_time = 0.0
+    expected_rows = []
+    for i in checked:
+        (_, expected), dt = measure(process_row_per_ray, (geometries, i, focal_spot, detector_points, length_points[i]))
+        per_ray_time += dt
+        expected_rows.append(np.array(expected))
+
+    rays = len(detector_points) * len(length_points)
+    print(f"{len(detector_points)} pixels x {len(length_points)} rows = {rays} rays")
+    print(f"per ray:    {per_ray_time / checked_rows * 1000:.2f} ms/row, "
+          f"projection estimate {per_ray_time / checked_rows * len(length_points):.2f} s")
+
+    max_differences = {}
+    for precision, dtype in PRECISIONS.items():
+        cast_geometries = [geom.astype(dtype) for geom in geometries]
+        vectorized_time = 0.0
+        max_difference = 0.0
+        for i, expected in zip(checked, expected_rows):
+            (_, row), dt = measure(process_row, (cast_geometries, i, focal_spot, detector_points, length_points[i], dtype))
+            vectorized_time += dt
+            max_difference = max(max_difference, np.max(np.abs(row - expected)))
+        max_differences[precision] = max_difference
+        print(f"{precision}:    {vectorized_time / checked_rows * 1000:.2f} ms/row, "
+              f"{len(detector_points) * checked_rows / vectorized_time / 1e6:.2f} Mrays/s, "
+              f"projection estimate {vectorized_time / checked_rows * len(length_points):.2f} s, "
+              f"speedup {per_ray_time / vectorized_time:.1f}x, max difference {max_difference:.3e} "
+              f"({max_difference / max(max(np.max(row) for row in expected_rows), 1e-12):.1e} of the longest path)")
+
+    detector_resolution = settings_config["detector_resolution"]
+    occlusion_args = (scene_config["detectors"], detector_points, detector_resolution, focal_spot)
+    t0 = time.perf_counter()
+    expected_occlusion = calculate_occlusion_per_pixel(scene_config["detectors"], detector_points, 1,
+                                                       detector_resolution, focal_spot)[0] == 1
+    per_pixel_time = time.perf_counter() - t0
+    occlusion, vectorized_occlusion_time = measure(lambda args: calculate_occlusion(*args), occlusion_args)
+    occlusion_matches = np.array_equal(occlusion, expected_occlusion)
+
+    print(f"occlusion per pixel: {per_pixel_time * 1000:.2f} ms, vectorized: {vectorized_occlusion_time * 1000:.2f} ms, "
+          f"{np.count_nonzero(occlusion)} occluded pixels, {'same' if occlusion_matches else 'different'} mask")
+
+    if max_differences["float64"] > 1e-9 * max(sphere["radius"], 1.0):
+        print("Vectorized float64 projection differs from the per ray result")
+        sys.exit(1)
+    if not occlusion_matches:
+        print("Vectorized occlusion differs from the per pixel result")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,248 @@
+import copy
+import numpy as np
+
+AXES = {"x": 0, "y": 1, "z": 2}
+
+def segment_length(D, t_enter, t_exit):
+    t_enter = np.maximum(t_enter, 0.0)
+    t_exit = np.minimum(t_exit, 1.0)
+    return np.where(t_enter < t_exit, np.sqrt(np.einsum("...i,...i", D, D)) * (t_exit - t_enter), 0.0)
+
+def slab(S, D, lo, hi):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t1 = (lo - S) / D
+        t2 = (hi - S) / D
+    parallel = D == 0
+    inside = (S >= lo) & (S <= hi)
+    t_enter = np.where(parallel, np.where(inside, -np.inf, np.inf), np.minimum(t1, t2))
+    t_exit = np.where(parallel, np.where(inside, np.inf, -np.inf), np.maximum(t1, t2))
+    return t_enter, t_exit
+
+class SphereGeometry:
+    def __init__(self, center, radius):
+        self.center = np.array(center)
+        self.radius = radius
+
+    @staticmethod
+    def from_config(config):
+        return SphereGeometry(np.array(config["center"], dtype=float), float(config["radius"]))
+
+    def bounds(self):
+        return self.center - self.radius, self.center + self.radius
+
+    def astype(self, dtype):
+        return SphereGeometry(self.center.astype(dtype), self.radius)
+
+    def meshes(self):
+        import pyvista as pv
+        return [pv.Sphere(radius=self.radius, center=tuple(self.center))]
+
+    def intersect_length(self, S, P):
+        S = np.asarray(S, dtype=float)
+        P = np.asarray(P, dtype=float)
+
+        D = P - S
+        f = S - self.center
+
+        a = np.dot(D, D)
+        b = 2.0 * np.dot(D, f)
+        c = np.dot(f, f) - self.radius ** 2
+
+        delta = b * b - 4 * a * c
+        if delta <= 0:
+            return 0.0
+
+        sqrt_delta = np.sqrt(delta)
+        t1 = (-b - sqrt_delta) / (2 * a)
+        t2 = (-b + sqrt_delta) / (2 * a)
+
+        t_enter = max(t1, 0.0)
+        t_exit  = min(t2, 1.0)
+
+        if t_enter >= t_exit:
+            return 0.0
+
+        return np.linalg.norm(D) * (t_exit - t_enter)
+
+    def intersect_length_batch(self, S, P):
+        D = P - S
+        f = S - self.center
+
+        a = np.einsum("...i,...i", D, D)
+        b = 2.0 * np.einsum("...i,...i", D, f)
+        c = np.einsum("...i,...i", f, f) - self.radius ** 2
+
+        delta = b * b - 4 * a * c
+        hit = delta > 0
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sqrt_delta = np.sqrt(np.where(hit, delta, 0.0))
+            t_enter = np.maximum((-b - sqrt_delta) / (2 * a), 0.0)
+            t_exit = np.minimum((-b + sqrt_delta) / (2 * a), 1.0)
+
+        hit &= t_enter < t_exit
+        return np.where(hit, np.sqrt(a) * (t_exit - t_enter), 0.0)
+
+class BoxGeometry:
+    def __init__(self, lo, hi):
+        self.lo = np.minimum(lo, hi)
+        self.hi = np.maximum(lo, hi)
+
+    @staticmethod
+    def from_config(config):
+        return BoxGeometry(np.array(config["min"], dtype=float), np.array(config["max"], dtype=float))
+
+    def bounds(self):
+        return self.lo, self.hi
+
+    def astype(self, dtype):
+        return BoxGeometry(self.lo.astype(dtype), self.hi.astype(dtype))
+
+    def meshes(self):
+        import pyvista as pv
+        return [pv.Box(bounds=(self.lo[0], self.hi[0], self.lo[1], self.hi[1], self.lo[2], self.hi[2]))]
+
+    def intersect_length_batch(self, S, P):
+        D = P - S
+        t_enter, t_exit = slab(S, D, self.lo, self.hi)
+        return segment_length(D, t_enter.max(axis=-1), t_exit.min(axis=-1))
+
+class CylinderGeometry:
+    def __init__(self, center, radius, length, axis="y"):
+        self.center = np.array(center)
+        self.radius = radius
+        self.length = length
+        self.axis = AXES[axis]
+        self.across = [i for i in range(3) if i != self.axis]
+
+    @staticmethod
+    def from_config(config):
+        return CylinderGeometry(np.array(config["center"], dtype=float), float(config["radius"]),
+                                float(config["length"]), config.get("axis", "y"))
+
+    def bounds(self):
+        half = np.full(3, self.radius)
+        half[self.axis] = self.length / 2
+        return self.center - half, self.center + half
+
+    def astype(self, dtype):
+        geometry = copy.copy(self)
+        geometry.center = self.center.astype(dtype)
+        return geometry
+
+    def meshes(self):
+        import pyvista as pv
+        direction = np.zeros(3)
+        direction[self.axis] = 1.0
+        return [pv.Cylinder(center=tuple(self.center), direction=tuple(direction),
+                            radius=self.radius, height=self.length)]
+
+    def intersect_length_batch(self, S, P):
+        D = P - S
+        D2 = D[..., self.across]
+        f = S[..., self.across] - self.center[self.across]
+
+        a = np.einsum("...i,...i", D2, D2)
+        b = 2.0 * np.einsum("...i,...i", D2, f)
+        c = np.einsum("...i,...i", f, f) - self.radius ** 2
+        delta = b * b - 4 * a * c
+
+        # rays parallel to the axis are either inside the circle for their whole length or miss it
+        parallel = a == 0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            sqrt_delta = np.sqrt(np.maximum(delta, 0.0))
+            t_enter = np.where(parallel, np.where(c <= 0, -np.inf, np.inf), (-b - sqrt_delta) / (2 * a))
+            t_exit = np.where(parallel, np.where(c <= 0, np.inf, -np.inf), (-b + sqrt_delta) / (2 * a))
+        t_exit = np.where(parallel | (delta > 0), t_exit, -np.inf)
+
+        half = self.length / 2
+        axial_enter, axial_exit = slab(S[..., self.axis], D[..., self.axis],
+                                       self.center[self.axis] - half, self.center[self.axis] + half)
+        return segment_length(D, np.maximum(t_enter, axial_enter), np.minimum(t_exit, axial_exit))
+
+class WireGridGeometry:
+    def __init__(self, center, radius, length, count, spacing, axis="y", spread_axis="x"):
+        offsets = (np.arange(count) - (count - 1) / 2) * spacing
+        self.wires = []
+        for offset in offsets:
+            wire_center = np.array(center, dtype=float)
+            wire_center[AXES[spread_axis]] += offset
+            self.wires.append(CylinderGeometry(wire_center, radius, length, axis))
+        self.scene = PhantomScene(self.wires)
+
+    @staticmethod
+    def from_config(config):
+        return WireGridGeometry(np.array(config["center"], dtype=float), float(config["radius"]),
+                                float(config["length"]), int(config["count"]), float(config["spacing"]),
+                                config.get("axis", "y"), config.get("spread_axis", "x"))
+
+    def bounds(self):
+        return self.scene.bounds()
+
+    def astype(self, dtype):
+        geometry = copy.copy(self)
+        geometry.scene = self.scene.astype(dtype)
+        geometry.wires = geometry.scene.geometries
+        return geometry
+
+    def meshes(self):
+        return [mesh for wire in self.wires for mesh in wire.meshes()]
+
+    def intersect_length_batch(self, S, P):
+        return self.scene.intersect_length_batch(S, P)
+
+class PhantomScene:
+    def __init__(self, geometries):
+        self.geometries = geometries
+        self.geometry_bounds = [geometry.bounds() for geometry in geometries]
+
+    def bounds(self):
+        lo = np.min([lo for lo, _ in self.geometry_bounds], axis=0)
+        hi = np.max([hi for _, hi in self.geometry_bounds], axis=0)
+        return lo, hi
+
+    def astype(self, dtype):
+        return PhantomScene([geometry.astype(dtype) for geometry in self.geometries])
+
+    def intersect_length_batch(self, S, P):
+        shape = np.broadcast_shapes(np.shape(S), np.shape(P))
+        S = np.broadcast_to(S, shape).reshape(-1, 3)
+        P = np.broadcast_to(P, shape).reshape(-1, 3)
+        ray_lo = np.ascontiguousarray(np.minimum(S, P).T)
+        ray_hi = np.ascontiguousarray(np.maximum(S, P).T)
+        batch_lo = ray_lo.min(axis=1)
+        batch_hi = ray_hi.max(axis=1)
+
+        result = np.zeros(len(P), dtype=P.dtype)
+        for geometry, (lo, hi) in zip(self.geometries, self.geometry_bounds):
+            # skip objects outside the box around all rays, then rays whose own box misses the object
+            if np.any(batch_hi < lo) or np.any(batch_lo > hi):
+                continue
+            mask = np.ones(len(P), dtype=bool)
+            for axis in range(3):
+                if batch_lo[axis] < lo[axis]:
+                    mask &= ray_hi[axis] >= lo[axis]
+                if batch_hi[axis] > hi[axis]:
+                    mask &= ray_lo[axis] <= hi[axis]
+            candidates = np.flatnonzero(mask)
+            if len(candidates) == len(P):
+                result += geometry.intersect_length_batch(S, P)
+            elif len(candidates):
+                result[candidates] += geometry.intersect_length_batch(S[candidates], P[candidates])
+
+        return result.reshape(shape[:-1])
+
+PHANTOM_TYPES = {
+    "sphere": SphereGeometry.from_config,
+    "box": BoxGeometry.from_config,
+    "cylinder": CylinderGeometry.from_config,
+    "wire_grid": WireGridGeometry.from_config,
+}
+
+def load_phantoms(configs):
+    geometries = []
+    for config in configs:
+        if config["type"] not in PHANTOM_TYPES:
+            raise ValueError(f"Unknown phantom type: {config['type']}")
+        geometries.append(PHANTOM_TYPES[config["type"]](config))
+    return geometries
@@ -1,62 +1,34 @@
+import argparse
 import json
-import sys
 import numpy as np
-import pyvista as pv
 import matplotlib.pyplot as plt
 from multiprocessing import Pool, cpu_count
+from multiprocessing.sharedctypes import RawArray
 from tqdm import tqdm
 
+from phantoms import SphereGeometry, PhantomScene, load_phantoms
+
 def load_config(path):
     with open(path, "r") as f:
         return json.load(f)
 
-class SphereGeometry:
-    def __init__(self, center, radius):
-        self.center = np.array(center)
-        self.radius = radius
-
-    def intersect_length(self, S, P):
-        S = np.asarray(S, dtype=float)
-        P = np.asarray(P, dtype=float)
-
-        D = P - S
-        f = S - self.center
-
-        a = np.dot(D, D)
-        b = 2.0 * np.dot(D, f)
-        c = np.dot(f, f) - self.radius ** 2
-
-        delta = b * b - 4 * a * c
-        if delta <= 0:
-            return 0.0
-
-        sqrt_delta = np.sqrt(delta)
-        t1 = (-b - sqrt_delta) / (2 * a)
-        t2 = (-b + sqrt_delta) / (2 * a)
-
-        t_enter = max(t1, 0.0)
-        t_exit  = min(t2, 1.0)
-
-        if t_enter >= t_exit:
-            return 0.0
-
-        return np.linalg.norm(D) * (t_exit - t_enter)
+def generate_scene(config, with_meshes=True, phantoms=None):
+    if phantoms:
+        geometries = load_phantoms(phantoms)
+    else:
+        geometries = [SphereGeometry(np.array([config["center"][0], 0, config["center"][1]]), config["radius"])]
 
-def generate_sphere(center, radius):
-    mesh = pv.Sphere(radius=radius, center=(center[0], 0, center[1]))
-    geom = SphereGeometry(np.array([center[0], 0, center[1]]), radius)
-    return mesh, geom
+    meshes = [mesh for geometry in geometries for mesh in geometry.meshes()] if with_meshes else []
+    return meshes, [PhantomScene(geometries)] if len(geometries) > 1 else geometries
 
-def generate_scene(config):
-    center = config["center"]
-    radius = config["radius"]
-    model, model_check = generate_sphere(center, radius)
-    return [model], [model_check]
-
-def create_focal_spot(config_focal, length_points):
+def create_focal_spot(config_focal, length_points, with_mesh=True):
     cx, cz = config_focal["center"]
     cy = 0.0
     focal_spot = np.array([cx, cy, cz])
+    if not with_mesh:
+        return focal_spot, None
+
+    import pyvista as pv
     focal_line = pv.Line(
         (cx, length_points[0], cz),
         (cx, length_points[-1], cz)
@@ -72,7 +44,7 @@ def calc_normal(detector):
     return np.cross(v, u)
 
 def cross(a, b):
-    return a[0] * b[1] - a[1] * b[0]
+    return a[..., 0] * b[..., 1] - a[..., 1] * b[..., 0]
 
 def is_occluded(focal_spot, point, occluder, eps=1e-9):
     fs = np.array([focal_spot[0], focal_spot[2]], dtype=float)
@@ -94,46 +66,77 @@ def is_occluded(focal_spot, point, occluder, eps=1e-9):
 
     return (t > eps) and (0.0 <= u <= 1.0)
 
-def create_detectors(detectors, config):
+def sample_detector_points(detectors, detector_resolution):
+    detectors = np.asarray(detectors, dtype=float).reshape(-1, 2, 2)
+    t = ((np.arange(detector_resolution) + 0.5) / detector_resolution)[None, :, None]
+    points = detectors[:, None, 0] * (1 - t) + detectors[:, None, 1] * t
+    return points.reshape(-1, 2)
+
+def create_detectors(detectors, config, with_meshes=True):
     length = config["length"]
     detector_resolution = config["detector_resolution"]
     roll_axis_resolution = config["roll_axis_resolution"]
 
     planes = []
-    detector_points = []
 
-    for detector in detectors:
+    if with_meshes:
+        import pyvista as pv
+
+        for detector in detectors:
+            center = ((detector[0][0] + detector[1][0]) / 2,
+                      0,
+                      (detector[0][1] + detector[1][1]) / 2)
+            normal = calc_normal(detector)
+            width = np.hypot(detector[0][0] - detector[1][0],
+                             detector[0][1] - detector[1][1])
+
+            plane = pv.Plane(
+                center=center,
+                direction=normal,
+                i_size=width,
+                j_size=length,
+                i_resolution=detector_resolution,
+                j_resolution=roll_axis_resolution
+            )
+            planes.append(plane)
+
+    detector_points = sample_detector_points(detectors, detector_resolution)
+
+    return planes, detector_points, np.linspace(-length / 2, length / 2, roll_axis_resolution)
+
+def occluded_batch(focal_spot, points, occluders, eps=1e-9):
+    fs = np.array([focal_spot[0], focal_spot[2]], dtype=float)
+    a = occluders[:, None, 0]
+    b = occluders[:, None, 1]
+
+    v = points - fs
+    w = b - a
+    c = a - fs
 
-        center = ((detector[0][0] + detector[1][0]) / 2,
-                  0,
-                  (detector[0][1] + detector[1][1]) / 2)
-        normal = calc_normal(detector)
-        width = np.hypot(detector[0][0] - detector[1][0],
-                         detector[0][1] - detector[1][1])
+    denominator = cross(v, w)
+    parallel = np.abs(denominator) < eps
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = cross(c, w) / denominator
+        u = cross(c, v) / denominator
 
-        plane = pv.Plane(
-            center=center,
-            direction=normal,
-            i_size=width,
-            j_size=length,
-            i_resolution=detector_resolution,
-            j_resolution=roll_axis_resolution
-        )
-        planes.append(plane)
-        current_detector_points = []
+    return ~parallel & (t > eps) & (u >= 0.0) & (u <= 1.0)
 
-        for i in range(detector_resolution):
-            t = (i + 0.5) / detector_resolution
-            x = detector[0][0] * (1 - t) + detector[1][0] * t
-            z = detector[0][1] * (1 - t) + detector[1][1] * t
-            current_detector_points.append((x, z))
+def calculate_occlusion(detectors, detector_points, detector_resolution, focal_spot):
+    detectors = np.asarray(detectors, dtype=float).reshape(-1, 2, 2)
+    points = np.asarray(detector_points, dtype=float).reshape(len(detectors), detector_resolution, 2)
+    occlusion_mask = np.zeros((len(detectors), detector_resolution), dtype=bool)
 
+    if len(detectors) > 1:
+        # only the pixels in an unbroken run from the edge facing the neighbour are hidden by it
+        occluded = occluded_batch(focal_spot, points[1:], detectors[:-1])
+        occlusion_mask[1:] |= np.logical_and.accumulate(occluded, axis=1)
 
-        detector_points += current_detector_points
+        occluded = occluded_batch(focal_spot, points[:-1, ::-1], detectors[1:])
+        occlusion_mask[:-1, ::-1] |= np.logical_and.accumulate(occluded, axis=1)
 
-    return planes, detector_points, np.linspace(-length / 2, length / 2, roll_axis_resolution)
+    return occlusion_mask.reshape(-1)
 
-def calculate_occlusion(detectors, detector_points, num_rows, detector_resolution, focal_spot):
+def calculate_occlusion_per_pixel(detectors, detector_points, num_rows, detector_resolution, focal_spot):
     width = len(detector_points)
     occlusion_mask = np.zeros((int(num_rows), width), dtype=np.uint8)
 
@@ -172,7 +175,39 @@ def sample_along_line(checks, focal_spot, point_on_plane, samples_per_unit_lengt
             result += 1
     return result
 
+PRECISIONS = {"float64": np.float64, "float32": np.float32}
+
+# rays of a row are intersected in blocks, so that the (rays, 3) intermediates of the kernels stay in the cache
+RAY_BLOCK_BYTES = 256 << 10
+
+def get_precision(settings_config):
+    precision = settings_config.get("precision", "float64")
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision: {precision}")
+    return PRECISIONS[precision]
+
+def ray_ends(focal_spot, plane_points, y, dtype=np.float64):
+    S = np.array([focal_spot[0], y, focal_spot[2]], dtype=dtype)
+    P = np.empty((len(plane_points), 3), dtype=dtype)
+    P[:, 0] = plane_points[:, 0]
+    P[:, 1] = y
+    P[:, 2] = plane_points[:, 1]
+    return S, P
+
+def intersect_row(geometries, S, P, out, block_bytes=None):
+    block = max(1, (block_bytes or RAY_BLOCK_BYTES) // (3 * P.itemsize))
+    out[:] = 0.0
+    for start in range(0, len(P), block):
+        for geom in geometries:
+            out[start:start + block] += geom.intersect_length_batch(S, P[start:start + block])
+    return out
+
 def process_row(args):
+    geometries, i, focal_spot, plane_points_row, y, dtype = args
+    S, P = ray_ends(focal_spot, np.asarray(plane_points_row, dtype=float), y, dtype)
+    return i, intersect_row(geometries, S, P, np.empty(len(P), dtype=dtype))
+
+def process_row_per_ray(args):
     geometries, i, focal_spot, plane_points_row, y = args
     S = np.array([focal_spot[0], y, focal_spot[2]])
 
@@ -187,30 +222,92 @@ def process_row(args):
 
     return i, results
 
-def process(geometries, focal_spot, plane_points, length_points):
-    projection_data = np.zeros((len(length_points), len(plane_points)))
-
-    tasks = [
-        (geometries, i, focal_spot, plane_points, length_points[i])
-        for i in range(len(length_points))
-    ]
-
-    with Pool(processes=cpu_count()) as pool:
-        with tqdm(total=len(length_points), desc="Progress", unit="row") as pbar:
-            for i, row in pool.imap(process_row, tasks):
-                projection_data[i] = row
-                pbar.update(1)
-
-    return projection_data
-
-def blend_occlusion(projection, occlusion):
-    projection_max = np.max(projection)
-    mask = occlusion == 1
-    projection[mask] = projection_max
+worker_state = {}
+
+def shared_projection(shared, shape, dtype):
+    return np.frombuffer(shared, dtype=dtype)[:int(np.prod(shape))].reshape(shape)
+
+def initialize_worker(geometries, focal_spot, plane_points, length_points, shape, dtype, block_bytes,
+                      shared=None, output=None):
+    worker_state.update(
+        geometries=geometries,
+        focal_spot=focal_spot,
+        plane_points=plane_points,
+        length_points=length_points,
+        shape=shape,
+        dtype=dtype,
+        block_bytes=block_bytes,
+        output=output
+    )
+    if output:
+        worker_state["offset"] = np.load(output, mmap_mode="r").offset
+    else:
+        worker_state["projection"] = shared_projection(shared, shape, dtype)
+
+def projection_rows(start, stop):
+    if not worker_state["output"]:
+        return worker_state["projection"][start:stop]
+
+    # only the rows of one chunk are mapped, so the memory of a worker does not grow with the projection
+    width = worker_state["shape"][1]
+    dtype = np.dtype(worker_state["dtype"])
+    return np.memmap(worker_state["output"], dtype=dtype, mode="r+", shape=(stop - start, width),
+                     offset=worker_state["offset"] + start * width * dtype.itemsize)
+
+def process_rows(rows):
+    start, stop = rows
+    projection = projection_rows(start, stop)
+    for i in range(start, stop):
+        S, P = ray_ends(worker_state["focal_spot"], worker_state["plane_points"], worker_state["length_points"][i],
+                        worker_state["dtype"])
+        intersect_row(worker_state["geometries"], S, P, projection[i - start], worker_state["block_bytes"])
+    if isinstance(projection, np.memmap):
+        projection.flush()
+    return stop - start
+
+def run_pool(initargs, chunks, rows):
+    with Pool(processes=cpu_count(), initializer=initialize_worker, initargs=initargs) as pool:
+        with tqdm(total=rows, desc="Progress", unit="row") as pbar:
+            for count in pool.imap_unordered(process_rows, chunks):
+                pbar.update(count)
+
+def process(geometries, focal_spot, plane_points, length_points, chunk_rows=None, output=None, dtype=np.float64,
+            block_bytes=None):
+    plane_points = np.asarray(plane_points, dtype=float)
+    geometries = [geom.astype(dtype) for geom in geometries]
+    itemsize = np.dtype(dtype).itemsize
+    shape = (len(length_points), len(plane_points))
+    if not chunk_rows:
+        chunk_rows = -(-len(length_points) // (cpu_count() * 4))
+        chunk_rows = max(1, min(chunk_rows, (64 << 20) // max(shape[1] * itemsize, 1)))
+    chunks = [(start, min(start + chunk_rows, len(length_points)))
+              for start in range(0, len(length_points), chunk_rows)]
+    initargs = (geometries, focal_spot, plane_points, length_points, shape, dtype, block_bytes)
+
+    if output:
+        projection_data = np.lib.format.open_memmap(output, mode="w+", dtype=dtype, shape=shape)
+        del projection_data
+        run_pool(initargs + (None, output), chunks, len(length_points))
+        return np.load(output, mmap_mode="r+")
+
+    # the workers write their rows straight into this buffer, which is released together with the returned array
+    shared = RawArray(np.ctypeslib.as_ctypes_type(dtype), max(int(np.prod(shape)), 1))
+    run_pool(initargs + (shared,), chunks, len(length_points))
+    return shared_projection(shared, shape, dtype)
+
+def blend_occlusion(projection, occlusion, chunk_rows=256):
+    if not np.any(occlusion):
+        return projection
+
+    projection_max = max(np.max(projection[start:start + chunk_rows])
+                         for start in range(0, len(projection), chunk_rows))
+    for start in range(0, len(projection), chunk_rows):
+        projection[start:start + chunk_rows, occlusion] = projection_max
     return projection
 
-
 def show(meshes, planes, focal_line):
+    import pyvista as pv
+
     plotter = pv.Plotter()
     for mesh in meshes:
         plotter.add_mesh(mesh, opacity=0.3, color="red")
@@ -221,23 +318,49 @@ def show(meshes, planes, focal_line):
     plotter.show(interactive_update=True)
     return plotter
 
-def save_projection(projection):
+def downsample_projection(projection, max_size=4096):
+    # every pixel is the maximum of a block of the projection, so narrow objects such as wires stay visible,
+    # the projection is read in bands of rows, so a memory-mapped one is never loaded as a whole
+    row_step = max(1, -(-projection.shape[0] // max_size))
+    column_step = max(1, -(-projection.shape[1] // max_size))
+    image = np.empty((-(-projection.shape[0] // row_step), -(-projection.shape[1] // column_step)),
+                     dtype=projection.dtype)
+    band_rows = max(1, (64 << 20) // max(row_step * projection.shape[1] * projection.dtype.itemsize, 1))
+    column_starts = np.arange(0, projection.shape[1], column_step)
+    for start in range(0, image.shape[0], band_rows):
+        band = np.asarray(projection[start * row_step:(start + band_rows) * row_step])
+        band = np.maximum.reduceat(band, np.arange(0, len(band), row_step), axis=0)
+        image[start:start + band_rows] = np.maximum.reduceat(band, column_starts, axis=1)
+    return image
+
+def save_projection(projection, max_size=4096):
+    image = downsample_projection(projection, max_size)
+
     fig = plt.figure(figsize=(10, 10), frameon=False)
     ax = fig.add_axes([0, 0, 1, 1])
-    ax.imshow(projection, origin='lower', cmap='jet')
+    ax.imshow(image, origin='lower', cmap='jet')
     ax.axis('off')
     plt.savefig("projection.png", dpi=300, bbox_inches='tight', pad_inches=0)
     plt.close()
 
 def main():
-    if len(sys.argv) < 3:
-        print("Usage: python sim.py <scene.json> <config.json>")
-        sys.exit(1)
-
-    scene_config = load_config(sys.argv[1])
-    settings_config = load_config(sys.argv[2])
-
-    meshes, checks = generate_scene(scene_config["sphere"])
+    parser = argparse.ArgumentParser(description="Projection simulation for XArray Constructor")
+    parser.add_argument("scene", help="Scene file generated by XArray Constructor")
+    parser.add_argument("config", help="Simulation configuration file")
+    parser.add_argument("--headless", action="store_true",
+                        help="Do not create meshes or display the scene, only save the projection")
+    parser.add_argument("--phantoms", default=None,
+                        help="File with a list of phantoms used instead of the sphere from the scene file")
+    parser.add_argument("--output", default=None,
+                        help="Stream the projection rows to this memory-mapped .npy file instead of keeping them in memory")
+    args = parser.parse_args()
+
+    scene_config = load_config(args.scene)
+    settings_config = load_config(args.config)
+    with_meshes = not args.headless
+
+    phantoms = load_config(args.phantoms)["phantoms"] if args.phantoms else None
+    meshes, checks = generate_scene(scene_config["sphere"], with_meshes, phantoms)
 
     detectors = scene_config["detectors"]
     detector_config = {
@@ -246,22 +369,24 @@ def main():
         "length": settings_config.get("detector_length")
     }
 
-    planes, detector_points, length_points = create_detectors(detectors, detector_config)
-    focal_spot, focal_line = create_focal_spot(scene_config["focal_spot"], length_points)
+    planes, detector_points, length_points = create_detectors(detectors, detector_config, with_meshes)
+    focal_spot, focal_line = create_focal_spot(scene_config["focal_spot"], length_points, with_meshes)
     occlusion_mask = calculate_occlusion(
         detectors,
         detector_points,
-        len(length_points),
         detector_config["detector_resolution"],
         focal_spot
     )
-    plotter = show(meshes, planes, focal_line)
+    plotter = show(meshes, planes, focal_line) if with_meshes else None
 
-    projection = process(checks, focal_spot, detector_points, length_points)
+    projection = process(checks, focal_spot, detector_points, length_points,
+                         chunk_rows=settings_config.get("chunk_rows"), output=args.output,
+                         dtype=get_precision(settings_config), block_bytes=settings_config.get("block_bytes"))
     projection = blend_occlusion(projection, occlusion_mask)
 
     save_projection(projection)
-    plotter.show()
+    if plotter:
+        plotter.show()
 
 if __name__ == '__main__':
     main()
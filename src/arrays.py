@@ -1,8 +1,10 @@
+import copy
+import time
 from .card import Card
+from .card_table import CardTable
 from typing import NamedTuple
 from .line import *
 from .point2d import Point2D
-from matplotlib.patches import Wedge
 
 
 class SlideParameters(NamedTuple):
@@ -10,21 +12,65 @@ class SlideParameters(NamedTuple):
     calc_max_start_point: object
     compare_d: object
     calc_near: object
+    line_y: float = None
+    corner: object = None
+    direction: int = 0
 
 
 class RotationParameters(NamedTuple):
     calc_start_point: object
     compare_d: object
     angle_range: object
+    line_x: float = None
+    line_y: float = None
 
 
-class Array:
-    def __init__(self, configuration):
-        self.cards = []
+class CardStats(NamedTuple):
+    direction: str
+    branch: str
+    angle: float
+    iterations: int
+    discarded_iterations: int
+    residual: float
+    time: float
+    accepted: bool
+    kept: bool
+
 
+class Engine(NamedTuple):
+    fit_sliding: object
+    fit_rotating: object
+    vectorized: bool
 
+
+class Array:
+    engines = {
+        "bisection": Engine(Card.fit_sliding, Card.fit_rotating, False),
+        "exact": Engine(Card.fit_sliding_exact, Card.fit_rotating_exact, True),
+    }
+
+    def __init__(self, configuration, card_model):
+        self.card_model = card_model
+        self.cards = CardTable.from_cards([], [])
+        self.configuration = None
+        self.engine = None
+        self.dirty = {"clockwise", "counterclockwise"}
+        self.configure(configuration)
+
+    def configure(self, configuration):
         configuration = configuration["array"]
 
+        if self.configuration is not None:
+            changed = {key for key in self.configuration.keys() | configuration.keys()
+                       if self.configuration.get(key) != configuration.get(key)}
+            # the clockwise chain ends on the right arm and the counterclockwise one on the left arm
+            if changed <= {"right_side"}:
+                self.invalidate("clockwise")
+            elif changed <= {"left_side"}:
+                self.invalidate("counterclockwise")
+            else:
+                self.invalidate()
+
         self.mode = configuration["mode"]
         self.offset_x = float(configuration["offset_x"])
         self.offset_z = float(configuration["offset_z"])
@@ -45,14 +91,13 @@ class Array:
             self.left_side_length = float(configuration["left_side"]["length"])
             self.left_side_height = float(configuration["left_side"]["height"])
 
-    def plot(self, ax, focal_spot, ray_length):
-        border_params = {
-            "linewidth": 0,
-            "fill": True,
-            "color": "black",
-            "alpha": 0.4
-        }
+        self.configuration = copy.deepcopy(configuration)
+
+    def invalidate(self, *parts):
+        # rebound instead of updated, so that shallow copies of a calculated array stay independent
+        self.dirty = self.dirty | set(parts or ("clockwise", "counterclockwise"))
 
+    def outline(self):
         l = self.offset_x
         r = self.offset_x + self.length
         t = self.offset_z + self.height
@@ -61,62 +106,57 @@ class Array:
         x = [l, r]
         y = [b, b]
 
-        horizontal_result = (l, r, t, b)
-        right_result = (0, 0, 0, 0)
-
         if self.right_side_enabled and self.mode == "compact":
-            rs_l = r
             rs_r = r + self.right_side_length #- self.bottom_thickness
-            rs_t = t
             rs_b = b - self.right_side_height
-            x.extend([rs_l, rs_r, rs_r])
-            y.extend([rs_b, rs_b, rs_t])
-
-            right_result = [rs_l, rs_r, rs_t, rs_b]
+            x.extend([r, rs_r, rs_r])
+            y.extend([rs_b, rs_b, t])
 
         x.extend([r, l])
         y.extend([t, t])
 
         if self.left_side_enabled and self.mode == "compact":
             ls_l = l - self.left_side_length
-            ls_r = l
-            ls_t = t
             ls_b = b - self.left_side_height
-            x.extend([ls_l, ls_l, ls_r])
-            y.extend([ls_t, ls_b, ls_b])
+            x.extend([ls_l, ls_l, l])
+            y.extend([t, ls_b, ls_b])
 
         x.extend([l])
         y.extend([b])
 
-        ax.plot(x, y, color='black')
-        for card in self.cards:
-            card.plot(ax, focal_spot)
+        return x, y
 
-        ax.add_patch(Wedge((focal_spot.x, focal_spot.y), ray_length, math.degrees(self.end_angle), math.degrees(self.start_angle), color='c', alpha=0.1))
+    def card_lines(self, focal_spot):
+        import numpy as np
 
-        return horizontal_result, right_result
+        cards = self.cards
+        plates = np.stack((cards.near, cards.near_on_plate_projection, cards.far_on_plate_projection, cards.far), axis=1)
+        photodiodes = np.stack((cards.near, cards.far), axis=1)
+        center = (cards.near + cards.far) / 2
+        rays = np.stack((center, np.broadcast_to((focal_spot.x, focal_spot.y), center.shape)), axis=1)
+        return plates, photodiodes, rays
 
 
-    def choose_side(focal_spot, angle, forward_angle, width, calc_start_point, compared_coordinate):
-        a, b = at_angle(focal_spot, angle)
-        start_point = calc_start_point(a, b)
-        end_point = point_at_angle(start_point, forward_angle, width)
-        center = Point2D.avg(start_point, end_point)
+    def choose_side(focal_spot, angle, forward_angle, width, line_y):
+        # x of the center of a card that starts where the ray at angle meets the line, relative to the focal spot
+        start_x = (line_y - focal_spot.y) / math.tan(angle)
+        return start_x + math.cos(forward_angle) * width / 2
 
-        return compared_coordinate(center) - compared_coordinate(focal_spot);
-
-    def calculate_arch(self, focal_spot):
-        self.cards = []
+    def calculate_arch(self, focal_spot, engine="bisection"):
+        if engine not in Array.engines:
+            raise ValueError(f"Unknown engine: {engine}")
+        if engine == self.engine and not self.dirty:
+            return self.calculated_end
 
         left_corner = Point2D(
-            self.offset_x - (self.bottom_thickness if self.left_side_enabled else 0) - Card.bottom_margin,
-            self.offset_z + self.bottom_thickness + Card.bottom_margin
+            self.offset_x - (self.bottom_thickness if self.left_side_enabled else 0) - self.card_model.bottom_margin,
+            self.offset_z + self.bottom_thickness + self.card_model.bottom_margin
         )
 
         right_corner = Point2D(
             self.offset_x + self.length + (
-                self.bottom_thickness if self.right_side_enabled else 0) + Card.bottom_margin,
-            self.offset_z + self.bottom_thickness + Card.bottom_margin)
+                self.bottom_thickness if self.right_side_enabled else 0) + self.card_model.bottom_margin,
+            self.offset_z + self.bottom_thickness + self.card_model.bottom_margin)
 
 
         start_point = Point2D (
@@ -129,32 +169,69 @@ class Array:
 
         angle = start_angle
         end_angle = right_corner.polar_angle(focal_spot)
+        self.left_end_angle = start_angle
+        self.right_end_angle = end_angle
 
         d1 = Point2D.dist(left_corner, focal_spot)
         d2 = Point2D.dist(right_corner, focal_spot)
 
         d = max(d1, d2)
 
-        while angle > end_angle:
-            previous_angle = angle
-            card, angle = Card.fit_along_arch(focal_spot, angle, Card.photodiode_size_x, d)
-            card.position_type = Card.PositionType.HORIZONTAL
-            if angle > end_angle:
-                self.cards.append(card)
+        if Array.engines[engine].vectorized:
+            angle = self.fill_arch(focal_spot, start_angle, end_angle, d)
+        else:
+            cards = []
+            while angle > end_angle:
+                previous_angle = angle
+                card, angle = Card.fit_along_arch(focal_spot, angle, self.card_model.photodiode_size_x, d)
+                if angle > end_angle:
+                    cards.append(card)
 
+            self.cards = CardTable.from_cards(cards, [Card.PositionType.HORIZONTAL] * len(cards))
+            self.cards.calc_plate_positions(self.card_model)
+            self.end_angle = previous_angle
 
-        self.end_angle = previous_angle
+        self.engine = engine
+        self.dirty = set()
+        self.calculated_end = angle
 
         return angle
 
-    def calculate(self, focal_spot):
-        self.cards = []
+    def fill_arch(self, focal_spot, start_angle, end_angle, radius):
+        import numpy as np
+
+        step = 2 * math.asin(self.card_model.photodiode_size_x / (2 * radius))
+        count = max(math.ceil((start_angle - end_angle) / step), 0)
+
+        edges = start_angle - step * np.arange(count)
+        points = np.column_stack((focal_spot.x + radius * np.cos(edges), focal_spot.y + radius * np.sin(edges)))
+        size = max(count - 1, 0)
+
+        self.cards = CardTable(points[:-1], points[1:], edges[:-1] - step / 2,
+                               np.ones(size, dtype=bool),
+                               np.full(size, Card.PositionType.HORIZONTAL.value))
+        self.cards.calc_plate_positions(self.card_model)
+
+        self.end_angle = start_angle - step * (count - 1) if count else start_angle
+
+        return start_angle - step * count
+
+    def calculate(self, focal_spot, engine="bisection", stats=None):
+        if engine not in Array.engines:
+            raise ValueError(f"Unknown engine: {engine}")
+        fit_sliding, fit_rotating, _ = Array.engines[engine]
+
+        # stats is a list that receives a CardStats for every fitted card, so everything is fitted again
+        parts = self.dirty if engine == self.engine and stats is None else {"clockwise", "counterclockwise"}
+        if not parts:
+            return self.calculated_end
 
         eps = 1e-2
+        width = self.card_model.photodiode_size_x
 
         left_corner = Point2D(
-            self.offset_x - (self.bottom_thickness if self.left_side_enabled else 0) - Card.bottom_margin,
-            self.offset_z + self.bottom_thickness + Card.bottom_margin
+            self.offset_x - (self.bottom_thickness if self.left_side_enabled else 0) - self.card_model.bottom_margin,
+            self.offset_z + self.bottom_thickness + self.card_model.bottom_margin
         )
 
         left_end = Point2D(
@@ -172,8 +249,8 @@ class Array:
 
         right_corner = Point2D(
             self.offset_x + self.length + (
-                self.bottom_thickness if self.right_side_enabled else 0) + Card.bottom_margin,
-            self.offset_z + self.bottom_thickness + Card.bottom_margin)
+                self.bottom_thickness if self.right_side_enabled else 0) + self.card_model.bottom_margin,
+            self.offset_z + self.bottom_thickness + self.card_model.bottom_margin)
 
         right_end = Point2D(
             right_corner.x,
@@ -185,6 +262,8 @@ class Array:
 
         right_corner_angle = right_corner.polar_angle(focal_spot)
         right_end_angle = right_end.polar_angle(focal_spot)
+        self.left_end_angle = left_end_angle
+        self.right_end_angle = right_end_angle
 
         start_point = Point2D (
             self.offset_x + self.initial_offset,
@@ -195,7 +274,7 @@ class Array:
         top_choose_max_far = lambda p1, p2: p1.y > p2.y
         top_calc_min_start_point = lambda a, b: Point2D((left_corner.y - b) / a, left_corner.y)
         top_calc_max_start_point = lambda p, angle: other_end_perpendicular_to_horizontal(p, angle,
-                                                                                               Card.photodiode_size_x,
+                                                                                               self.card_model.photodiode_size_x,
                                                                                                top_choose_max_far)
         cw_calc_max_start_point_at_corner = lambda p, angle: other_end_perpendicular_to_horizontal_on_x(p,
                                                                                                              angle,
@@ -206,9 +285,8 @@ class Array:
                                                                                                               left_corner.x)
         cc_forward_angle = 0
         ccw_forward_angle = math.radians(270)
-        top_compared_coordinate = lambda p: p.x
 
-        right_x = right_corner.x - Card.bottom_margin
+        right_x = right_corner.x - self.card_model.bottom_margin
         right_calc_start_point = lambda a, b: Point2D(right_x, right_x * a + b)
         right_forward_angle = math.radians(-90)
 
@@ -221,18 +299,22 @@ class Array:
             calc_min_start_point=top_calc_min_start_point,
             calc_max_start_point=top_calc_max_start_point,
             compare_d=lambda d: d < 0,
-            calc_near=lambda far: other_end(0, left_corner.y, far, Card.photodiode_size_x,
+            calc_near=lambda far: other_end(0, left_corner.y, far, self.card_model.photodiode_size_x,
                                                  lambda p1, p2: p1.x > p2.x
-                                                 )
+                                                 ),
+            line_y=left_corner.y,
+            direction=-1
         )
 
         sliding_right_to_left = SlideParameters(
             calc_min_start_point=top_calc_min_start_point,
             calc_max_start_point=top_calc_max_start_point,
             compare_d=lambda d: d > 0,
-            calc_near=lambda far: other_end(0, left_corner.y, far, Card.photodiode_size_x,
+            calc_near=lambda far: other_end(0, left_corner.y, far, self.card_model.photodiode_size_x,
                                                  lambda p1, p2: p1.x < p2.x
-                                                 )
+                                                 ),
+            line_y=left_corner.y,
+            direction=1
         )
 
         sliding_left_to_right_corner = SlideParameters(
@@ -241,11 +323,14 @@ class Array:
             compare_d=lambda d: d < 0,
             calc_near=lambda far: Card.calc_near_over_a_corner(far, right_corner,
                                                                lambda a, b, far: other_end(a, b, far,
-                                                                                                Card.photodiode_size_x,
+                                                                                                self.card_model.photodiode_size_x,
                                                                                                 lambda p1,
                                                                                                        p2: p1.x > p2.x
                                                                                                 )
-                                                               )
+                                                               ),
+            line_y=left_corner.y,
+            corner=right_corner,
+            direction=-1
         )
 
         sliding_right_to_left_corner = SlideParameters(
@@ -254,125 +339,163 @@ class Array:
             compare_d=lambda d: d > 0,
             calc_near=lambda far: Card.calc_near_over_a_corner(far, left_corner,
                                                                lambda a, b, far: other_end(a, b, far,
-                                                                                                Card.photodiode_size_x,
+                                                                                                self.card_model.photodiode_size_x,
                                                                                                 lambda p1,
                                                                                                        p2: p1.x < p2.x
                                                                                                 )
-                                                               )
+                                                               ),
+            line_y=left_corner.y,
+            corner=left_corner,
+            direction=1
         )
 
         rotating_left_to_right = RotationParameters(
             calc_start_point=top_calc_min_start_point,
             compare_d=lambda d: d > 0,
-            angle_range=(cc_forward_angle, cc_forward_angle + math.radians(90))
+            angle_range=(cc_forward_angle, cc_forward_angle + math.radians(90)),
+            line_y=left_corner.y
         )
 
         rotating_right_to_left = RotationParameters(
             calc_start_point=top_calc_min_start_point,
             compare_d=lambda d: d > 0,
-            angle_range=(ccw_forward_angle, ccw_forward_angle - math.radians(90))
+            angle_range=(ccw_forward_angle, ccw_forward_angle - math.radians(90)),
+            line_y=left_corner.y
         )
 
         cw_rotating_top_to_bottom = RotationParameters(
             calc_start_point=right_calc_start_point,
             compare_d=lambda d: d < 0,
-            angle_range=(right_forward_angle, right_forward_angle + math.radians(90))
+            angle_range=(right_forward_angle, right_forward_angle + math.radians(90)),
+            line_x=right_x
         )
         ccw_rotating_top_to_bottom = RotationParameters(
             calc_start_point=left_calc_start_point,
             compare_d=lambda d: d < 0,
-            angle_range=(left_forward_angle, left_forward_angle - math.radians(90))
+            angle_range=(left_forward_angle, left_forward_angle - math.radians(90)),
+            line_x=left_x
         )
 
-        angle = start_angle
-        previous_angle = 0
-
-        #clockwise
-        while angle > right_end_angle:
-            previous_angle = angle
-            if angle > right_corner_angle:
-                side = Array.choose_side(focal_spot, angle, cc_forward_angle, Card.photodiode_size_x,
-                                         top_calc_min_start_point, top_compared_coordinate)
-                if side > 0:
-                    card, angle = Card.fit_sliding(focal_spot, angle, Card.photodiode_size_x, sliding_left_to_right,
-                                                   eps)
-                    card.position_type = Card.PositionType.HORIZONTAL
-                    if card.near.x > right_corner.x:
-                        card, angle = Card.fit_sliding(focal_spot, previous_angle, Card.photodiode_size_x,
-                                                       sliding_left_to_right_corner, eps)
-                        card.position_type = Card.PositionType.RIGHT
-                else:
-                    card, angle = Card.fit_rotating(focal_spot, angle, Card.photodiode_size_x, rotating_left_to_right,
-                                                    eps)
-                    card.position_type = Card.PositionType.HORIZONTAL
-            elif self.right_side_enabled:
-                card, angle = Card.fit_rotating(focal_spot, angle, Card.photodiode_size_x, cw_rotating_top_to_bottom, eps)
-                card.position_type = Card.PositionType.RIGHT
-
-            if angle > right_end_angle:
-                self.cards.append(card)
-        self.end_angle = previous_angle
-
-        #counterclockwise
-        angle = start_angle
-
+        if "clockwise" in parts:
+            self.clockwise_cards = []
+            self.clockwise_positions = []
+            angle = start_angle
+            previous_angle = 0
 
-        if angle >= left_end_angle:
-            self.start_angle = start_angle
-        else:
-            while angle < left_end_angle:
+            #clockwise
+            while angle > right_end_angle:
                 previous_angle = angle
-                if angle < left_corner_angle:
-                    side = Array.choose_side(focal_spot, angle, ccw_forward_angle, Card.photodiode_size_x,
-                                             top_calc_min_start_point, top_compared_coordinate)
-                    if side < 0:
-                        card, angle = Card.fit_sliding(focal_spot, angle, Card.photodiode_size_x, sliding_right_to_left,
-                                                       eps)
-                        if card.near.x < left_corner.x:
-                            card, angle = Card.fit_sliding(focal_spot, previous_angle, Card.photodiode_size_x,
-                                                           sliding_right_to_left_corner, eps)
-                            card.position_type = Card.PositionType.LEFT
+                if stats is not None:
+                    t0 = time.perf_counter()
+                discarded = 0
+                if angle > right_corner_angle:
+                    side = Array.choose_side(focal_spot, angle, cc_forward_angle, width, left_corner.y)
+                    if side > 0:
+                        card, angle = fit_sliding(focal_spot, angle, width, sliding_left_to_right, eps)
+                        branch = "sliding"
+                        position = Card.PositionType.HORIZONTAL
+                        if card.near[0] > right_corner.x:
+                            discarded = card.iterations
+                            card, angle = fit_sliding(focal_spot, previous_angle, width, sliding_left_to_right_corner, eps)
+                            branch = "corner"
+                            position = Card.PositionType.RIGHT
                     else:
-                        card, angle = Card.fit_rotating(focal_spot, angle, Card.photodiode_size_x, rotating_right_to_left,
-                                                        eps)
-                    card.position_type = Card.PositionType.HORIZONTAL
-                elif self.left_side_enabled:
-                    card, angle = Card.fit_rotating(focal_spot, angle, Card.photodiode_size_x, ccw_rotating_top_to_bottom, eps)
-                    card.position_type = Card.PositionType.LEFT
-
-                if angle < left_end_angle:
-                    self.cards.append(card)
-            self.start_angle = previous_angle
-
-        return angle
+                        card, angle = fit_rotating(focal_spot, angle, width, rotating_left_to_right, eps)
+                        branch = "rotating"
+                        position = Card.PositionType.HORIZONTAL
+                elif self.right_side_enabled:
+                    card, angle = fit_rotating(focal_spot, angle, width, cw_rotating_top_to_bottom, eps)
+                    branch = "side"
+                    position = Card.PositionType.RIGHT
+
+                if stats is not None:
+                    stats.append(CardStats("clockwise", branch, math.degrees(card.angle), card.iterations + discarded, discarded,
+                                           card.residual, time.perf_counter() - t0, card.accepted,
+                                           angle > right_end_angle))
+
+                if angle > right_end_angle:
+                    self.clockwise_cards.append(card)
+                    self.clockwise_positions.append(position)
+            self.end_angle = previous_angle
+
+        if "counterclockwise" in parts:
+            self.counterclockwise_cards = []
+            self.counterclockwise_positions = []
+            #counterclockwise
+            angle = start_angle
+
+            if angle >= left_end_angle:
+                self.start_angle = start_angle
+            else:
+                while angle < left_end_angle:
+                    previous_angle = angle
+                    if stats is not None:
+                        t0 = time.perf_counter()
+                    discarded = 0
+                    if angle < left_corner_angle:
+                        side = Array.choose_side(focal_spot, angle, ccw_forward_angle, width, left_corner.y)
+                        if side < 0:
+                            card, angle = fit_sliding(focal_spot, angle, width, sliding_right_to_left, eps)
+                            branch = "sliding"
+                            if card.near[0] < left_corner.x:
+                                discarded = card.iterations
+                                card, angle = fit_sliding(focal_spot, previous_angle, width, sliding_right_to_left_corner, eps)
+                                branch = "corner"
+                                position = Card.PositionType.LEFT
+                        else:
+                            card, angle = fit_rotating(focal_spot, angle, width, rotating_right_to_left, eps)
+                            branch = "rotating"
+                        position = Card.PositionType.HORIZONTAL
+                    elif self.left_side_enabled:
+                        card, angle = fit_rotating(focal_spot, angle, width, ccw_rotating_top_to_bottom, eps)
+                        branch = "side"
+                        position = Card.PositionType.LEFT
+
+                    if stats is not None:
+                        stats.append(CardStats("counterclockwise", branch, math.degrees(card.angle), card.iterations + discarded,
+                                               discarded, card.residual, time.perf_counter() - t0, card.accepted,
+                                               angle < left_end_angle))
+
+                    if angle < left_end_angle:
+                        self.counterclockwise_cards.append(card)
+                        self.counterclockwise_positions.append(position)
+                self.start_angle = previous_angle
+            self.calculated_end = angle
+
+        self.engine = engine
+        self.dirty = set()
+        self.cards = CardTable.from_cards(self.clockwise_cards + self.counterclockwise_cards,
+                                          self.clockwise_positions + self.counterclockwise_positions)
+        self.cards.calc_plate_positions(self.card_model)
+
+        return self.calculated_end
 
     def export(self, focal_spot):
-        platforms = []
-        detectors = []
-
-        for card in self.cards:
-            local_platforms = []
-            for i in range(len(Card.platforms)):
-                plate = card.plates[i]
-                p1 = (plate[0][0], Card.platforms[i].y, plate[0][1])
-                p2 = (plate[1][0], Card.platforms[i].y, plate[1][1])
-                local_platforms.append((p1, p2))
-
-            near = (card.near[0], Card.photodiode_offset_y, card.near[1])
-            far = (card.far[0], Card.photodiode_offset_y, card.far[1])
-
-            angle_near = angle_around_point(near, focal_spot)
-            angle_far = angle_around_point(far, focal_spot)
-
-            if angle_near < angle_far:
-                near, far = far, near
-                local_platforms = [(p2, p1) for (p1, p2) in local_platforms]
-
-            platforms.extend(local_platforms)
-
-            detectors.append((near, far))
-
-        return {"platforms": platforms, "detectors": detectors}
+        import numpy as np
+
+        cards = self.cards
+        count = len(cards)
+
+        detectors = np.empty((count, 2, 3))
+        detectors[:, 0, 0] = cards.near[:, 0]
+        detectors[:, 0, 2] = cards.near[:, 1]
+        detectors[:, 1, 0] = cards.far[:, 0]
+        detectors[:, 1, 2] = cards.far[:, 1]
+        detectors[:, :, 1] = self.card_model.photodiode_offset_y
+
+        platforms = np.empty((count, len(self.card_model.platforms), 2, 3))
+        platforms[..., 0] = cards.plates[..., 0]
+        platforms[..., 2] = cards.plates[..., 1]
+        platforms[..., 1] = np.array([platform.y for platform in self.card_model.platforms])[None, :, None]
+
+        # same as angle_around_point applied to the exported (x, y, z) points
+        angle_near = (math.pi - np.arctan2(self.card_model.photodiode_offset_y - focal_spot[1], cards.near[:, 0] - focal_spot[0])) % (2 * math.pi)
+        angle_far = (math.pi - np.arctan2(self.card_model.photodiode_offset_y - focal_spot[1], cards.far[:, 0] - focal_spot[0])) % (2 * math.pi)
+        swapped = angle_near < angle_far
+        detectors[swapped] = detectors[swapped, ::-1]
+        platforms[swapped] = platforms[swapped, :, ::-1]
+
+        return {"platforms": platforms.reshape(-1, 2, 3).tolist(), "detectors": detectors.tolist()}
 
     def plot3d(self, focal_spot):
         import matplotlib.pyplot as plt
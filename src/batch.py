@@ -0,0 +1,80 @@
+import glob
+import importlib
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import NamedTuple
+
+from .scanner import Scanner
+
+
+class BatchResult(NamedTuple):
+    scanner_file_path: str
+    cards: int
+    rejected: int
+    actual_end: float
+    time: float
+    export: dict = None
+    error: str = None
+
+
+def expand_paths(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    return paths
+
+
+def evaluate(scanner_file_path, engine="bisection"):
+    try:
+        t0 = time.perf_counter()
+        scanner = Scanner()
+        scanner.configure_from_file(scanner_file_path)
+        scanner.calculate_array(engine)
+        export = scanner.array.export(scanner.tube.focal_spot)
+        dt = (time.perf_counter() - t0) * 1000
+    except Exception as e:
+        return BatchResult(scanner_file_path, 0, 0, math.nan, 0.0, error=f"{type(e).__name__}: {e}")
+
+    cards = scanner.array.cards
+    return BatchResult(scanner_file_path, len(cards), int((~cards.accepted).sum()), scanner.actual_end, dt, export)
+
+
+def initialize_worker():
+    # NumPy is loaded once per worker process, so that its import time is not counted in the first result
+    importlib.import_module("numpy")
+
+
+def run_batch(scanner_file_paths, engine="bisection", jobs=None):
+    scanner_file_paths = list(scanner_file_paths)
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(scanner_file_paths) < 2:
+        return [evaluate(path, engine) for path in scanner_file_paths]
+
+    chunksize = max(1, len(scanner_file_paths) // (4 * jobs))
+    with ProcessPoolExecutor(jobs, initializer=initialize_worker) as executor:
+        return list(executor.map(evaluate, scanner_file_paths, repeat(engine), chunksize=chunksize))
+
+
+def format_summary(results):
+    width = max([len("scanner")] + [len(result.scanner_file_path) for result in results])
+    lines = [f"{'scanner':<{width}}  {'cards':>6}  {'rejected':>8}  {'end angle':>9}  {'time [ms]':>9}  status"]
+    for result in results:
+        status = "ok" if result.error is None else f"error: {result.error}"
+        lines.append(f"{result.scanner_file_path:<{width}}  {result.cards:>6}  {result.rejected:>8}  "
+                     f"{result.actual_end:>9.2f}  {result.time:>9.2f}  {status}")
+    return "\n".join(lines)
+
+
+def write_summary_csv(results, filename):
+    import csv
+
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(["scanner", "cards", "rejected", "actual_end", "time_ms", "error"])
+        for result in results:
+            writer.writerow([result.scanner_file_path, result.cards, result.rejected, result.actual_end,
+                             result.time, result.error or ""])
@@ -1,54 +1,54 @@
-import json
-
+from .model_registry import ModelRegistry
 from .point2d import Point2D
 from .line import *
 import math
-from enum import Enum
+import sys
+from enum import IntEnum
+from typing import NamedTuple
 import os
 
 
 class Card:
-    photodiode_size_x = None
-
     @staticmethod
     def get_cards_list():
         files = os.listdir("cards")
         return [os.path.splitext(file)[0] for file in files if file.endswith('.json')]
 
-    class PositionType(Enum):
+    class PositionType(IntEnum):
         UNDEFINED = 0
         LEFT = 1
         HORIZONTAL = 2
         RIGHT = 3
 
+    class Fit(NamedTuple):
+        near: tuple
+        far: tuple
+        angle: float
+        accepted: bool
+        iterations: int
+        residual: float
+
     class Platform:
         def __init__(self, configuration):
             self.y = float(configuration["y"])
             self.z = float(configuration["z"])
 
-    @staticmethod
-    def set_card_configuration(card_file_path):
-        card_file = open(card_file_path, 'r')
-        card_data = json.load(card_file)
-        Card.configure(card_data)
+    class Model:
+        def __init__(self, configuration):
+            self.plate_size_x = configuration["plate_size_x"]
 
-    @staticmethod
-    def configure(configuration):
-        Card.plate_size_x = configuration["plate_size_x"]
+            self.photodiode_offset_x = configuration["photodiode_offset_x"]
+            self.photodiode_offset_z = configuration["photodiode_offset_z"]
+            self.photodiode_offset_y = configuration["photodiode_offset_y"]
 
-        Card.photodiode_offset_x = configuration["photodiode_offset_x"]
-        Card.photodiode_offset_z = configuration["photodiode_offset_z"]
-        Card.photodiode_offset_y = configuration["photodiode_offset_y"]
+            self.photodiode_size_x = configuration["photodiode_size_x"]
+            self.photodiode_size_y = configuration["photodiode_size_y"]
 
-        Card.photodiode_size_x = configuration["photodiode_size_x"]
-        Card.photodiode_size_y = configuration["photodiode_size_y"]
+            self.bottom_margin = configuration["bottom_margin"]
 
-        Card.bottom_margin = configuration["bottom_margin"]
+            self.platforms = [Card.Platform(platform_config) for platform_config in configuration["platforms"]]
 
-        Card.platforms = []
-        for platform_config in configuration["platforms"]:
-            hole_array = Card.Platform(platform_config)
-            Card.platforms.append(hole_array)
+    models = ModelRegistry(Model)
 
     def __init__(self, near, far, angle, accepted):
         self.near = near
@@ -56,12 +56,19 @@ class Card:
         self.accepted = accepted
         self.angle = angle
         self.position_type = Card.PositionType.UNDEFINED
-        self.plates = []
+        self.iterations = 0
+        self.residual = 0.0
 
     def verify_perpendicularity(focal_spot, near, far):
-        center = Point2D.avg(far, near)
-        card_a, _ = line_between_points(far, near)
-        perp_a, _ = line_between_points(center, focal_spot)
+        return Card.perpendicularity(focal_spot.x, focal_spot.y, near.x, near.y, far.x, far.y)
+
+    @staticmethod
+    def perpendicularity(focal_x, focal_y, near_x, near_y, far_x, far_y):
+        # the same as line_between_points for the card and for the line from its center to the focal spot
+        card_dx = near_x - far_x
+        perp_dx = focal_x - (far_x + near_x) / 2
+        card_a = (near_y - far_y) / card_dx if card_dx else sys.float_info.max/2
+        perp_a = (focal_y - (far_y + near_y) / 2) / perp_dx if perp_dx else sys.float_info.max/2
         return card_a * perp_a + 1
 
     def verify_perpendicularity_X(focal_spot, near, far):
@@ -82,31 +89,12 @@ class Card:
 
         return dot_product
 
-    def generate_card(near, far, fit, focal_spot, d, eps):
+    def generate_card(near, far, fit, focal_spot, d, eps, iterations=1):
         center_angle = Point2D.avg(near, far).polar_angle(focal_spot)
-        result_card = Card(near, far, center_angle, abs(d) < eps * 10)
+        result_card = Card.Fit((near.x, near.y), (far.x, far.y), center_angle, abs(d) < eps * 10, iterations, d)
         result_angle = fit.polar_angle(focal_spot)
-        for platform in Card.platforms:
-            result_card.plates += [result_card.calc_plate_position(platform.z)]
         return result_card, result_angle
 
-    def calc_plate_position(self, plate_z):
-        a, b = line_between_points(self.near, self.far)
-
-        self.near_on_plate_projection = other_end_along_perpendicular(a, b, self.near,
-                                                                           self.photodiode_offset_z - plate_z,
-                                                                           lambda p1, p2: p1.y > p2.y)
-        self.far_on_plate_projection = other_end_along_perpendicular(a, b, self.far,
-                                                                          self.photodiode_offset_z - plate_z,
-                                                                          lambda p1, p2: p1.y > p2.y)
-
-        left = self.near_on_plate_projection if self.near_on_plate_projection.x < self.far_on_plate_projection.x else self.far_on_plate_projection
-
-        plate_left = point_at_angle(left, self.angle + math.radians(90), Card.photodiode_offset_x)
-        plate_right = point_at_angle(plate_left, self.angle - math.radians(90), Card.plate_size_x)
-
-        return plate_left, plate_right
-
     def fit_sliding(focal_spot, angle, width, params, eps):
         a, b = at_angle(focal_spot, angle)
         min_far = params.calc_min_start_point(a, b)
@@ -116,7 +104,9 @@ class Card:
         last_d = 1
         d = 0
         col = 0.1
+        iterations = 0
         while abs(d - last_d) > eps:
+            iterations += 1
             far = Point2D.avg(min_far, max_far)
             near = params.calc_near(far)
 
@@ -133,7 +123,44 @@ class Card:
 
             col = min(col + 0.05, 1)
 
-        return Card.generate_card(near, far, near, focal_spot, d, eps)
+        return Card.generate_card(near, far, near, focal_spot, d, eps, iterations)
+
+    @staticmethod
+    def fit_sliding_exact(focal_spot, angle, width, params, eps):
+        focal_x, focal_y = focal_spot.x, focal_spot.y
+        cos, sin = math.cos(angle), math.sin(angle)
+        h = params.line_y - focal_y
+        # the same bracket as in fit_sliding, measured along the ray
+        lo = abs(h / sin)
+        if params.corner is None:
+            hi = abs((h + width) / sin)
+            r = chord_end_on_horizontal(h, angle, lo, hi, width, params.direction)
+        else:
+            corner_x, corner_y = params.corner.x - focal_x, params.corner.y - focal_y
+            hi = abs(corner_x / cos)
+            r = chord_end_over_point(corner_x, corner_y, angle, lo, hi, width)
+        if r is None:
+            return Card.fit_sliding(focal_spot, angle, width, params, eps)
+
+        far_x, far_y = focal_x + r * cos, focal_y + r * sin
+        if params.corner is None:
+            root_base = width**2 - (params.line_y - far_y)**2
+            near_x = far_x - params.direction * (math.sqrt(root_base) if root_base >= 0 else width)
+            near_y = params.line_y
+        else:
+            ux, uy = params.corner.x - far_x, params.corner.y - far_y
+            step = -params.direction * width / math.hypot(ux, uy)
+            if ux < 0:
+                step = -step
+            near_x, near_y = far_x + ux * step, far_y + uy * step
+
+        d = Card.perpendicularity(focal_x, focal_y, near_x, near_y, far_x, far_y)
+        if (near_x + far_x) / 2 < focal_x:
+            d = -d
+
+        center_angle = math.atan2((near_y + far_y) / 2 - focal_y, (near_x + far_x) / 2 - focal_x)
+        result_angle = math.atan2(near_y - focal_y, near_x - focal_x)
+        return Card.Fit((near_x, near_y), (far_x, far_y), center_angle, abs(d) < eps * 10, 1, d), result_angle
 
     @staticmethod
     def calc_near_over_a_corner(far, corner, calc_near):
@@ -150,8 +177,10 @@ class Card:
         last_d = 1
         d = 0
         col = 0.1
+        iterations = 0
 
         while abs(d - last_d) > eps:
+            iterations += 1
             far_angle = (min_far_angle + max_far_angle) / 2
             far = point_at_angle(near, far_angle, width)
             last_d = d
@@ -164,7 +193,29 @@ class Card:
 
             col = min(col + 0.05, 1)
 
-        return Card.generate_card(near, far, far, focal_spot, d, eps)
+        return Card.generate_card(near, far, far, focal_spot, d, eps, iterations)
+
+    @staticmethod
+    def fit_rotating_exact(focal_spot, angle, width, params, eps):
+        focal_x, focal_y = focal_spot.x, focal_spot.y
+        cos, sin = math.cos(angle), math.sin(angle)
+        # the near end is where the ray meets the line, a negative radius means it is behind the focal spot
+        if params.line_x is None:
+            radius = (params.line_y - focal_y) / sin
+            near_x, near_y = focal_x + radius * cos, params.line_y
+        else:
+            radius = (params.line_x - focal_x) / cos
+            near_x, near_y = params.line_x, focal_y + radius * sin
+
+        far_angle = chord_end_rotated(angle, radius, width, params.angle_range)
+        if far_angle is None:
+            return Card.fit_rotating(focal_spot, angle, width, params, eps)
+        far_x, far_y = focal_x + radius * math.cos(far_angle), focal_y + radius * math.sin(far_angle)
+
+        d = Card.perpendicularity(focal_x, focal_y, near_x, near_y, far_x, far_y)
+
+        # both ends are on a circle around the focal spot, so the center of the card is halfway between their angles
+        return Card.Fit((near_x, near_y), (far_x, far_y), (angle + far_angle) / 2, abs(d) < eps * 10, 1, d), far_angle
 
     @staticmethod
     def fit_along_arch(focal_spot, angle, width, radius):
@@ -173,15 +224,6 @@ class Card:
         right = points[0] if points[0].x > points[1].x else points[1]
         return Card.generate_card(left, right, right, focal_spot, 0, 1)
 
-    def plot(self, ax, focal_spot):
-        points = [self.near, self.near_on_plate_projection, self.far_on_plate_projection, self.far]
-        x = [p.x for p in points]
-        y = [p.y for p in points]
-        ax.plot(x, y, color='navy', lw=1, alpha=0.3)
-        ax.plot([self.near.x, self.far.x], [self.near.y, self.far.y], color=('b' if self.accepted else 'r'))
-        center = Point2D.avg(self.near, self.far)
-        ax.plot([center.x, focal_spot.x], [center.y, focal_spot.y], color='k', lw=1, alpha=0.2)
-
     def y_range(self):
         return min(self.near)
 
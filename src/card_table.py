@@ -0,0 +1,58 @@
+from itertools import chain
+
+
+class CardTable:
+    def __init__(self, near, far, angle, accepted, position_type):
+        import numpy as np
+
+        self.near = np.asarray(near, dtype=np.float64).reshape(-1, 2)
+        self.far = np.asarray(far, dtype=np.float64).reshape(-1, 2)
+        self.angle = np.asarray(angle, dtype=np.float64)
+        self.accepted = np.asarray(accepted, dtype=bool)
+        self.position_type = np.asarray(position_type, dtype=np.int8)
+
+        self.plates = np.zeros((len(self.angle), 0, 2, 2))
+        self.near_on_plate_projection = np.zeros((len(self.angle), 2))
+        self.far_on_plate_projection = np.zeros((len(self.angle), 2))
+
+    @staticmethod
+    def from_cards(cards, position_types):
+        import numpy as np
+
+        # fromiter over flat coordinates avoids converting a list of (x, y) tuples
+        count = len(cards)
+        near, far, angle, accepted = list(zip(*cards))[:4] or ((),) * 4
+        return CardTable(np.fromiter(chain.from_iterable(near), np.float64, 2 * count),
+                         np.fromiter(chain.from_iterable(far), np.float64, 2 * count),
+                         np.fromiter(angle, np.float64, count),
+                         np.fromiter(accepted, bool, count),
+                         np.fromiter(position_types, np.int8, count))
+
+    def __len__(self):
+        return len(self.angle)
+
+    def calc_plate_positions(self, card_model):
+        import numpy as np
+
+        direction = self.far - self.near
+        normal = np.column_stack((-direction[:, 1], direction[:, 0]))
+        with np.errstate(all='ignore'):
+            normal /= np.hypot(normal[:, 0], normal[:, 1])[:, None]
+        normal[normal[:, 1] < 0] *= -1
+
+        # steps along the angle turned by +90 and -90 degrees
+        cos, sin = np.cos(self.angle), np.sin(self.angle)
+        left_step = np.column_stack((-sin, cos)) * card_model.photodiode_offset_x
+        right_step = np.column_stack((sin, -cos)) * card_model.plate_size_x
+
+        self.plates = np.zeros((len(self), len(card_model.platforms), 2, 2))
+        for i, platform in enumerate(card_model.platforms):
+            distance = abs(card_model.photodiode_offset_z - platform.z)
+            self.near_on_plate_projection = self.near + normal * distance
+            self.far_on_plate_projection = self.far + normal * distance
+
+            near_is_left = self.near_on_plate_projection[:, 0] < self.far_on_plate_projection[:, 0]
+            left = np.where(near_is_left[:, None], self.near_on_plate_projection, self.far_on_plate_projection)
+
+            self.plates[:, i, 0] = left + left_step
+            self.plates[:, i, 1] = self.plates[:, i, 0] + right_step
@@ -0,0 +1,253 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+from . import profiling
+from .arrays import Array
+from .batch import expand_paths, format_summary, run_batch, write_summary_csv
+from .optimizer import OBJECTIVES, format_score, optimize_initial_offset
+from .scanner import Scanner
+from .sweep import parse_values, save_results, sweep
+
+
+def output_path(directory, scanner_file_path, extension=".json"):
+    os.makedirs(directory, exist_ok=True)
+    filename = os.path.splitext(os.path.basename(scanner_file_path))[0]
+    return os.path.join(directory, filename + extension)
+
+
+def compute(args):
+    failed = 0
+    for scanner_file_path in args.files:
+        try:
+            t0 = time.perf_counter()
+            scanner = Scanner()
+            scanner.configure_from_file(scanner_file_path)
+            scanner.calculate_array(args.engine)
+            dt = (time.perf_counter() - t0) * 1000
+
+            if not args.no_export:
+                scanner.export_array(output_path(args.output_dir, scanner_file_path))
+            if not args.no_simulation:
+                scanner.export_simulation_input(output_path(args.simulation_dir, scanner_file_path))
+        except Exception as e:
+            failed += 1
+            print(f"{scanner_file_path}: error: {e}", file=sys.stderr)
+            continue
+
+        print(f"{scanner_file_path}: {len(scanner.array.cards)} cards, "
+              f"end angle {scanner.actual_end:.2f}, {dt:.2f} ms")
+
+    return 1 if failed else 0
+
+
+def calculate(scanner_file_path, engine):
+    scanner = Scanner()
+    scanner.configure_from_file(scanner_file_path)
+    t0 = time.perf_counter()
+    scanner.calculate_array(engine)
+    dt = (time.perf_counter() - t0) * 1000
+    return scanner.array.cards, dt
+
+
+def card_deviation(reference_cards, cards):
+    import numpy as np
+
+    order = np.argsort(reference_cards.angle)
+    angles = reference_cards.angle[order]
+    i = np.searchsorted(angles, cards.angle)
+
+    deviation = None
+    for candidate in (np.clip(i - 1, 0, len(angles) - 1), np.clip(i, 0, len(angles) - 1)):
+        reference = order[candidate]
+        distance = np.maximum(np.hypot(*(cards.near - reference_cards.near[reference]).T),
+                              np.hypot(*(cards.far - reference_cards.far[reference]).T))
+        deviation = distance if deviation is None else np.minimum(deviation, distance)
+    return float(deviation.max())
+
+
+def compare(args):
+    failed = 0
+    for scanner_file_path in args.files:
+        reference_cards, reference_dt = calculate(scanner_file_path, args.reference)
+        cards, dt = calculate(scanner_file_path, args.engine)
+        deviation = card_deviation(reference_cards, cards) if len(reference_cards) and len(cards) else 0
+
+        status = "ok"
+        if deviation > args.tolerance or abs(len(cards) - len(reference_cards)) > args.card_count_tolerance:
+            status = "FAILED"
+            failed += 1
+
+        print(f"{scanner_file_path}: {status}, "
+              f"{len(reference_cards)} / {len(cards)} cards, "
+              f"max deviation {deviation:.4f}, "
+              f"{reference_dt:.2f} ms / {dt:.2f} ms")
+
+    return 1 if failed else 0
+
+
+def batch(args):
+    results = run_batch(expand_paths(args.files), args.engine, args.jobs)
+
+    if args.output_dir:
+        for result in results:
+            if result.export is not None:
+                with open(output_path(args.output_dir, result.scanner_file_path), 'w', encoding='utf-8') as f:
+                    json.dump(result.export, f, indent=4, ensure_ascii=False)
+    if args.summary:
+        write_summary_csv(results, args.summary)
+
+    print(format_summary(results))
+    return 1 if any(result.error is not None for result in results) else 0
+
+
+def run_sweep(args):
+    with open(args.file, 'r') as scanner_file:
+        base_configuration = json.load(scanner_file)
+
+    t0 = time.perf_counter()
+    try:
+        grid = {}
+        for parameter in args.parameters:
+            field, _, values = parameter.partition("=")
+            grid[field] = parse_values(values)
+        fields, rows = sweep(base_configuration, grid, args.engine, args.jobs)
+    except (KeyError, ValueError) as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    dt = time.perf_counter() - t0
+    save_results(args.output, fields, rows)
+
+    failed = sum(1 for _, _, error in rows if error)
+    print(f"{len(rows)} combinations, {failed} failed, {dt:.2f} s, results saved to {args.output}")
+    return 1 if failed else 0
+
+
+def optimize(args):
+    scanner = Scanner()
+    scanner.configure_from_file(args.file)
+
+    t0 = time.perf_counter()
+    result = optimize_initial_offset(scanner, args.objective, args.engine, args.samples)
+    dt = (time.perf_counter() - t0) * 1000
+
+    print(f"{args.file}: initial card offset {result.offset:.4f}, {format_score(args.objective, result.score)}, "
+          f"{result.evaluations} evaluations, {dt:.2f} ms")
+
+    if args.save:
+        scanner.config["array"]["initial_card_offset"] = result.offset
+        scanner.save_configuration(args.file)
+    return 0
+
+
+def profile(args):
+    try:
+        stats = profiling.collect(args.file, args.engine)
+    except ValueError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+
+    print(profiling.format_summary(stats))
+    print()
+    print(profiling.format_histogram(stats))
+
+    if args.output:
+        profiling.save_stats(args.output, stats)
+    if args.histogram:
+        profiling.plot_histogram(args.histogram, stats)
+    return 0
+
+
+def create_parser():
+    parser = argparse.ArgumentParser(prog="python -m src.cli",
+                                     description="XArray Constructor without the graphical interface")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compute_parser = subparsers.add_parser("compute", help="Calculate arrays and export the results")
+    compute_parser.add_argument("files", nargs="+", help="Scanner configuration files")
+    compute_parser.add_argument("--output-dir", default="output",
+                                help="Directory for the detector positions (default: output)")
+    compute_parser.add_argument("--simulation-dir", default="simulation",
+                                help="Directory for the simulation input (default: simulation)")
+    compute_parser.add_argument("--no-export", action="store_true",
+                                help="Do not export the detector positions")
+    compute_parser.add_argument("--no-simulation", action="store_true",
+                                help="Do not export the simulation input")
+    compute_parser.add_argument("--engine", choices=Array.engines, default="bisection",
+                                help="Card fitting engine (default: bisection)")
+    compute_parser.set_defaults(func=compute)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare card fitting engines card by card")
+    compare_parser.add_argument("files", nargs="+", help="Scanner configuration files")
+    compare_parser.add_argument("--engine", choices=Array.engines, default="exact",
+                                help="Card fitting engine to check (default: exact)")
+    compare_parser.add_argument("--reference", choices=Array.engines, default="bisection",
+                                help="Card fitting engine used as the reference (default: bisection)")
+    compare_parser.add_argument("--tolerance", type=float, default=1.0,
+                                help="Largest allowed distance between matching card ends (default: 1.0)")
+    compare_parser.add_argument("--card-count-tolerance", type=int, default=1,
+                                help="Largest allowed difference in the number of cards (default: 1)")
+    compare_parser.set_defaults(func=compare)
+
+    batch_parser = subparsers.add_parser("batch", help="Calculate many scanners in parallel and print a summary")
+    batch_parser.add_argument("files", nargs="+", help="Scanner configuration files or glob patterns")
+    batch_parser.add_argument("--jobs", type=int, default=None,
+                              help="Number of worker processes (default: number of CPUs)")
+    batch_parser.add_argument("--engine", choices=Array.engines, default="bisection",
+                              help="Card fitting engine (default: bisection)")
+    batch_parser.add_argument("--output-dir", default=None,
+                              help="Directory for the detector positions, nothing is exported if omitted")
+    batch_parser.add_argument("--summary", default=None,
+                              help="CSV file for the summary table")
+    batch_parser.set_defaults(func=batch)
+
+    sweep_parser = subparsers.add_parser("sweep", help="Calculate a scanner for every combination of parameter values")
+    sweep_parser.add_argument("file", help="Base scanner configuration file")
+    sweep_parser.add_argument("-p", "--parameter", dest="parameters", action="append", required=True,
+                              metavar="FIELD=VALUES",
+                              help="Configuration field and its values, either a list (array.height=100,120) "
+                                   "or start:stop:count (tube.offset_x=-50:50:11). Can be repeated")
+    sweep_parser.add_argument("--output", default="sweep.csv",
+                              help="Result file, .csv or .npz (default: sweep.csv)")
+    sweep_parser.add_argument("--jobs", type=int, default=None,
+                              help="Number of worker processes (default: number of CPUs)")
+    sweep_parser.add_argument("--engine", choices=Array.engines, default="bisection",
+                              help="Card fitting engine (default: bisection)")
+    sweep_parser.set_defaults(func=run_sweep)
+
+    optimize_parser = subparsers.add_parser("optimize", help="Find the best initial card offset")
+    optimize_parser.add_argument("file", help="Scanner configuration file")
+    optimize_parser.add_argument("--objective", choices=OBJECTIVES, default="rejected",
+                                 help="rejected: fewest rejected cards, fan: array closest to the tube fan, "
+                                      "gap: smallest unused angle at the ends of the array (default: rejected)")
+    optimize_parser.add_argument("--engine", choices=Array.engines, default="exact",
+                                 help="Card fitting engine (default: exact)")
+    optimize_parser.add_argument("--samples", type=int, default=16,
+                                 help="Offsets evaluated in each refinement step (default: 16)")
+    optimize_parser.add_argument("--save", action="store_true",
+                                 help="Write the best offset to the scanner file")
+    optimize_parser.set_defaults(func=optimize)
+
+    profile_parser = subparsers.add_parser("profile", help="Report the work done to fit every card")
+    profile_parser.add_argument("file", help="Scanner configuration file, compact mode only")
+    profile_parser.add_argument("--engine", choices=Array.engines, default="bisection",
+                                help="Card fitting engine (default: bisection)")
+    profile_parser.add_argument("--output", default=None,
+                                help="Save the statistics of every card to a .json or .csv file")
+    profile_parser.add_argument("--histogram", default=None,
+                                help="Save a histogram of the iterations per card to an image file")
+    profile_parser.set_defaults(func=profile)
+
+    return parser
+
+
+def main(argv=None):
+    parser = create_parser()
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
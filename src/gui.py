@@ -1,3 +1,4 @@
+import copy
 import sys
 import subprocess
 import time
@@ -7,11 +8,14 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QLabel, QLineEdit, QCheckBox, QPushButton, QDoubleSpinBox,
                                QComboBox, QGroupBox, QGridLayout, QScrollArea, QFrame,
                                QMenu,  QMessageBox)
-from PySide6.QtCore import Qt, QSettings, QDir, QFileInfo
+from PySide6.QtCore import Qt, QSettings, QDir, QFileInfo, QObject, QRunnable, QThreadPool, QTimer, Signal
 from matplotlib.figure import Figure
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas, NavigationToolbar2QT as NavigationToolbar
 
 from .card import Card
+from .optimizer import OBJECTIVES, optimize_initial_offset
+from .renderer import ScannerRenderer
+from .scanner import Scanner
 from .tube import Tube
 
 @contextmanager
@@ -25,6 +29,90 @@ def benchmark(enabled: bool, label: str):
     dt = (time.perf_counter() - t0) * 1000
     print(f"{label}: {dt:.2f} ms")
 
+def snapshot(scanner):
+    # the calculation only rebinds attributes of the scanner, tube and array, so shallow copies are not affected by it
+    result = copy.copy(scanner)
+    result.tube = copy.copy(scanner.tube)
+    result.array = copy.copy(scanner.array)
+    return result
+
+class CalculationJob(QRunnable):
+    def __init__(self, calculator, generation, configuration):
+        super().__init__()
+        self.calculator = calculator
+        self.generation = generation
+        self.configuration = configuration
+
+    def run(self):
+        self.calculator.calculate(self.generation, self.configuration)
+
+class OptimizationJob(QRunnable):
+    def __init__(self, calculator, generation, configuration, objective):
+        super().__init__()
+        self.calculator = calculator
+        self.generation = generation
+        self.configuration = configuration
+        self.objective = objective
+
+    def run(self):
+        self.calculator.optimize(self.generation, self.configuration, self.objective)
+
+class Calculator(QObject):
+    finished = Signal(int, object)
+    optimized = Signal(int, object)
+    failed = Signal(int, str)
+
+    def __init__(self, benchmark=False):
+        super().__init__()
+        self.scanner = Scanner()
+        self.generation = 0
+        self.benchmark = benchmark
+        # a single thread runs the jobs in order, so the scanner can reuse the results of the previous one
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+    def cancel(self):
+        self.generation += 1
+        self.pool.clear()
+
+    def submit(self, configuration):
+        self.cancel()
+        self.pool.start(CalculationJob(self, self.generation, copy.deepcopy(configuration)))
+        return self.generation
+
+    def calculate(self, generation, configuration):
+        if generation != self.generation:
+            return
+        try:
+            with benchmark(self.benchmark, "calculation"):
+                self.scanner.configure(configuration)
+                self.scanner.calculate_array()
+        except Exception as e:
+            self.failed.emit(generation, f"{type(e).__name__}: {e}")
+            return
+        if generation == self.generation:
+            self.finished.emit(generation, snapshot(self.scanner))
+
+    def submit_optimization(self, configuration, objective):
+        self.cancel()
+        self.pool.start(OptimizationJob(self, self.generation, copy.deepcopy(configuration), objective))
+        return self.generation
+
+    def optimize(self, generation, configuration, objective):
+        if generation != self.generation:
+            return
+        try:
+            with benchmark(self.benchmark, "optimization"):
+                scanner = Scanner()
+                scanner.config = configuration
+                scanner.update_configuration()
+                result = optimize_initial_offset(scanner, objective)
+        except Exception as e:
+            self.failed.emit(generation, f"{type(e).__name__}: {e}")
+            return
+        if generation == self.generation:
+            self.optimized.emit(generation, result)
+
 class Gui(QMainWindow):
     def __init__(self, scanner, benchmark = False):
         super().__init__()
@@ -37,6 +125,14 @@ class Gui(QMainWindow):
         self.auto_update_box = None
         self.scanner = scanner
         self.benchmark = benchmark
+        self.calculator = Calculator(benchmark)
+        self.calculator.finished.connect(self.on_calculated)
+        self.calculator.optimized.connect(self.on_optimized)
+        self.calculator.failed.connect(self.on_calculation_failed)
+        self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
+        self.update_timer.setInterval(100)
+        self.update_timer.timeout.connect(self.recalculate)
         self.setWindowTitle("XArray Constructor")
         self.setWindowState(Qt.WindowMaximized)
         self.setMinimumSize(800, 600)
@@ -49,8 +145,10 @@ class Gui(QMainWindow):
         self.fig = Figure()
         self.ax = self.fig.add_subplot(111)
         self.ax.set_aspect('equal')
+        self.renderer = ScannerRenderer(self.ax)
         self.canvas = FigureCanvas(self.fig)
         self.toolbar = NavigationToolbar(self.canvas, self)
+        self.canvas.mpl_connect("resize_event", lambda event: self.renderer.update_detail())
 
         self.layout.addWidget(self.canvas, 0, 0, 1, 1)
         self.layout.addWidget(self.toolbar, 1, 0, 1, 1)
@@ -70,10 +168,19 @@ class Gui(QMainWindow):
     def plot(self):
         self.ax.set_xlim(self.current_xlim)
         self.ax.set_ylim(self.current_ylim)
-        self.scanner.plot(self.ax)
+        self.renderer.update(self.scanner)
         self.canvas.draw()
 
     def recalculate(self):
+        self.update_timer.stop()
+        self.calculator.submit(self.scanner.config)
+
+    def on_calculated(self, generation, scanner):
+        if generation != self.calculator.generation:
+            return
+        # the calculated state replaces the one of the displayed scanner, its configuration stays
+        vars(self.scanner).update(vars(scanner))
+
         if self.case_changed:
             margin = self.scanner.case_size_x / 10
             self.current_xlim = (self.scanner.case_offset_x - margin,
@@ -85,12 +192,30 @@ class Gui(QMainWindow):
             self.current_xlim = self.ax.set_xlim()
             self.current_ylim = self.ax.set_ylim()
 
-        self.ax.clear()
-        with benchmark(self.benchmark, "calculation"):
-            self.scanner.calculate_array()
         with benchmark(self.benchmark, "plot"):
             self.plot()
 
+    def on_calculation_failed(self, generation, message):
+        if generation == self.calculator.generation:
+            self.statusBar().showMessage(f"Calculation failed: {message}", 5000)
+
+    def optimize_initial_offset(self):
+        # the search runs in the calculation thread, a pending calculation is replaced by it
+        self.update_timer.stop()
+        self.calculator.submit_optimization(self.scanner.config, self.objective_box.currentText())
+        self.statusBar().showMessage("Optimizing the initial card offset...")
+
+    def on_optimized(self, generation, result):
+        if generation != self.calculator.generation:
+            return
+        # the spinbox shows the offset rounded to its decimals, the configuration keeps the exact value
+        self.initial_offset_box.blockSignals(True)
+        self.initial_offset_box.setValue(result.offset)
+        self.initial_offset_box.blockSignals(False)
+        self.scanner.config["array"]["initial_card_offset"] = result.offset
+        self.statusBar().clearMessage()
+        self.recalculate()
+
     def save(self):
         self.scanner.save_configuration(self.scanner_name.text())
 
@@ -192,10 +317,10 @@ class Gui(QMainWindow):
 
         pos[path[-1]] = var
 
-        self.scanner.update_configuration()
-
+        # the calculation starts once the value stops changing, results of the previous values are not drawn
         if self.auto_update_box.isChecked():
-            self.recalculate()
+            self.calculator.cancel()
+            self.update_timer.start()
 
     def __create_spinbox(self,):
         spinbox = QDoubleSpinBox()
@@ -391,11 +516,22 @@ class Gui(QMainWindow):
         update_button.clicked.connect(self.recalculate)
         update_button.setFixedWidth(84)
 
-        x_offset_box = self.create_spinbox(["array", "initial_card_offset"])
+        self.initial_offset_box = self.create_spinbox(["array", "initial_card_offset"])
         layout.addWidget(self.auto_update_box, 0, 0, 1, 1)
         layout.addWidget(update_button, 0, 2, 1, 1)
         layout.addWidget(QLabel("Initial card offset"), 1, 0, 1, 1)
-        layout.addWidget(x_offset_box, 1, 2, 1, 1)
+        layout.addWidget(self.initial_offset_box, 1, 2, 1, 1)
+
+        self.objective_box = QComboBox()
+        self.objective_box.addItems(OBJECTIVES)
+        self.objective_box.setToolTip("rejected: fewest rejected cards\n"
+                                      "fan: array closest to the tube fan\n"
+                                      "gap: smallest unused angle at the ends of the array")
+        optimize_button = QPushButton("Optimize")
+        optimize_button.clicked.connect(self.optimize_initial_offset)
+        optimize_button.setFixedWidth(84)
+        layout.addWidget(self.objective_box, 2, 0, 1, 1)
+        layout.addWidget(optimize_button, 2, 2, 1, 1)
 
         export_button = QPushButton("Export")
 
@@ -406,7 +542,7 @@ class Gui(QMainWindow):
 )
         export_button.setMenu(menu)
 
-        layout.addWidget(export_button, 2, 0, 1, 3)
+        layout.addWidget(export_button, 3, 0, 1, 3)
 
         group_box.setLayout(layout)
         return group_box
@@ -88,4 +88,86 @@ def other_end_perpendicular_to_vertical(p, angle , l, choose_point):
     y = p.y + dy
     p1 = Point2D(p.x + l, y)
     p2 = Point2D(p.x - l, y)
-    return p1 if choose_point(p1, p2) else p2
\ No newline at end of file
+    return p1 if choose_point(p1, p2) else p2
+
+def newton_in_bracket(residual, lo, hi, tolerance=1e-9, max_iterations=50):
+    f_lo, _ = residual(lo)
+    f_hi, _ = residual(hi)
+    if f_lo == 0:
+        return lo
+    if f_hi == 0:
+        return hi
+    if (f_lo > 0) == (f_hi > 0):
+        return None
+
+    x = (lo + hi) / 2
+    for _ in range(max_iterations):
+        f, df = residual(x)
+        if f == 0:
+            return x
+        if (f > 0) == (f_lo > 0):
+            lo = x
+        else:
+            hi = x
+
+        next_x = x - f / df if df else (lo + hi) / 2
+        if not min(lo, hi) <= next_x <= max(lo, hi):
+            next_x = (lo + hi) / 2
+        if abs(next_x - x) < tolerance:
+            return next_x
+        x = next_x
+    return x
+
+def chord_end_on_horizontal(h, angle, lo, hi, l, direction):
+    # radius at which a chord of length l starting at angle ends on the horizontal line h above the center
+    def residual(r):
+        ratio = l / (2 * r)
+        end_angle = angle + direction * 2 * math.asin(ratio)
+        d_end_angle = -direction * 2 * ratio / (r * math.sqrt(1 - ratio**2))
+        return r * math.sin(end_angle) - h, math.sin(end_angle) + r * math.cos(end_angle) * d_end_angle
+
+    if lo <= l / 2 or hi <= l / 2:
+        return None
+
+    # the end angle changes slowly with the radius, so the radius that puts the end on the line
+    # usually settles within a few steps, Newton's method is kept for shallow angles where it does not
+    r = lo
+    for _ in range(20):
+        ratio = l / (2 * r)
+        if ratio >= 1:
+            break
+        next_r = h / math.sin(angle + direction * 2 * math.asin(ratio))
+        if abs(next_r - r) < 1e-9:
+            return next_r if lo <= next_r <= hi or hi <= next_r <= lo else None
+        r = next_r
+    return newton_in_bracket(residual, lo, hi)
+
+def chord_end_over_point(cx, cy, angle, lo, hi, l):
+    # radius at which a chord of length l starting at angle passes through the point (cx, cy) relative to the center
+    k = math.cos(angle) * cx + math.sin(angle) * cy
+    c2 = cx**2 + cy**2
+
+    def residual(r):
+        m = math.sqrt(max(c2 - 2 * r * k + r**2, 0))
+        dm = (r - k) / m if m else 0
+        return 2 * r * (k - r) + l * m, 2 * k - 4 * r + l * dm
+
+    return newton_in_bracket(residual, lo, hi)
+
+def chord_end_rotated(angle, radius, l, angle_range):
+    # polar angle of the other end of a chord of length l starting at angle, heading within angle_range
+    if l > 2 * radius:
+        return None
+
+    delta = 2 * math.asin(l / (2 * radius))
+    low, high = angle_range
+    if low > high:
+        low, high = high, low
+    # a chord to the end rotated by -delta or +delta heads at angle -/+ (delta / 2 + 90 degrees),
+    # so only the end that is kept has to be computed
+    turn = delta / 2 + math.pi / 2
+    if (angle - turn - low) % (2 * math.pi) <= high - low:
+        return angle - delta
+    if (angle + turn - low) % (2 * math.pi) <= high - low:
+        return angle + delta
+    return None
@@ -0,0 +1,20 @@
+import json
+import os
+
+
+class ModelRegistry:
+    def __init__(self, model_type):
+        self.model_type = model_type
+        self.models = {}
+
+    def get(self, file_path):
+        mtime = os.stat(file_path).st_mtime_ns
+        entry = self.models.get(file_path)
+        if entry is None or entry[0] != mtime:
+            with open(file_path, 'r') as model_file:
+                entry = (mtime, self.model_type(json.load(model_file)))
+            self.models[file_path] = entry
+        return entry[1]
+
+    def clear(self):
+        self.models.clear()
@@ -0,0 +1,70 @@
+import copy
+import math
+from typing import NamedTuple
+
+from .scanner import Scanner
+
+
+def end_gap(array):
+    return max(array.end_angle - array.right_end_angle, 0) + max(array.left_end_angle - array.start_angle, 0)
+
+
+def fan_misfit(scanner):
+    return abs(scanner.array.start_angle - scanner.tube.start_angle) + abs(scanner.array.end_angle - scanner.tube.end_angle)
+
+
+def rejected_cards(array):
+    return int((~array.cards.accepted).sum())
+
+
+# every objective is a tuple compared lexicographically, the first element is the one being optimized
+OBJECTIVES = {
+    "rejected": lambda scanner: (rejected_cards(scanner.array), end_gap(scanner.array)),
+    "fan": lambda scanner: (fan_misfit(scanner), rejected_cards(scanner.array)),
+    "gap": lambda scanner: (end_gap(scanner.array), rejected_cards(scanner.array)),
+}
+
+
+class OptimizationResult(NamedTuple):
+    offset: float
+    score: tuple
+    evaluations: int
+
+
+def optimize_initial_offset(scanner, objective="rejected", engine="exact", samples=16, refinements=2):
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective: {objective}")
+    score = OBJECTIVES[objective]
+    width = scanner.card_model.photodiode_size_x
+
+    # the trials run on a copy so that the configuration and the cards of the caller are left as they were
+    trial = Scanner()
+    trial.config = copy.deepcopy(scanner.config)
+    array_configuration = trial.config["array"]
+
+    scores = {}
+
+    def evaluate(offset):
+        if offset not in scores:
+            array_configuration["initial_card_offset"] = offset
+            trial.update_configuration()
+            trial.calculate_array(engine)
+            scores[offset] = score(trial)
+        return scores[offset]
+
+    lo, hi = 0.0, width
+    for _ in range(refinements + 1):
+        step = (hi - lo) / samples
+        best = min((lo + step * i for i in range(samples)), key=evaluate)
+        lo, hi = max(best - step, 0.0), min(best + step, width)
+    best = min(scores, key=scores.get)
+
+    return OptimizationResult(best, scores[best], len(scores))
+
+
+def format_score(objective, score):
+    if objective == "rejected":
+        return f"{score[0]} rejected cards, end gap {math.degrees(score[1]):.4f} deg"
+    if objective == "fan":
+        return f"fan misfit {math.degrees(score[0]):.4f} deg, {score[1]} rejected cards"
+    return f"end gap {math.degrees(score[0]):.4f} deg, {score[1]} rejected cards"
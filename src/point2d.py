@@ -1,6 +1,10 @@
 import math
 
 class Point2D():
+    # Points are never modified after creation, every operation returns a new one. This is not enforced,
+    # a __setattr__ guard would slow down every construction, so points compare by value but are not hashable.
+    __slots__ = ("x", "y")
+
     @staticmethod
     def avg(a, b):
         return Point2D((a.x + b.x)/2, (a.y + b.y)/2)
@@ -12,31 +16,32 @@ class Point2D():
     def __init__(self, x, y):
         self.x = x
         self.y = y
-    def __str__(self):
-        return f"(x: {self.x}, y: {self.y})"
 
     def __getitem__(self, index):
-        match index:
-            case 0:
-                return self.x
-            case 1:
-                return self.y
-            case _:
-                raise Exception("Bad index")
+        if index == 0:
+            return self.x
+        if index == 1:
+            return self.y
+        raise IndexError("Bad index")
+
+    def __eq__(self, other):
+        if not isinstance(other, Point2D):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
 
     def __str__(self):
         return f"Point2D({self.x}, {self.y})"
     __repr__ = __str__
 
     def rotated(self, origin, angle):
-        x = origin.x + math.cos(angle) * (self.x - origin.x) - math.sin(angle) * (self.y - origin.y)
-        y = origin.y + math.sin(angle) * (self.x - origin.x) + math.cos(angle) * (self.y - origin.y)
-        return Point2D(x, y)
+        cos = math.cos(angle)
+        sin = math.sin(angle)
+        dx = self.x - origin.x
+        dy = self.y - origin.y
+        return Point2D(origin.x + cos * dx - sin * dy, origin.y + sin * dx + cos * dy)
 
     def translated(self, vector):
-        x = self.x + vector.x
-        y = self.y + vector.y
-        return Point2D(x, y)
+        return Point2D(self.x + vector.x, self.y + vector.y)
 
     def polar_angle(self, center):
         angle = math.atan2(self.y - center.y, self.x - center.x)
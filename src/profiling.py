@@ -0,0 +1,84 @@
+from collections import Counter
+
+from .arrays import CardStats
+from .scanner import Scanner
+
+BRANCHES = ["sliding", "rotating", "corner", "side"]
+
+
+def collect(scanner_file_path, engine="bisection"):
+    scanner = Scanner()
+    scanner.configure_from_file(scanner_file_path)
+    stats = []
+    scanner.calculate_array(engine, stats)
+    return stats
+
+
+def format_summary(stats):
+    lines = [f"{'branch':<10} {'cards':>6} {'iterations':>11} {'mean':>6} {'max':>5} {'discarded':>10} "
+             f"{'max |d|':>10} {'time ms':>9}"]
+    for branch in BRANCHES:
+        selected = [s for s in stats if s.branch == branch]
+        if not selected:
+            continue
+        iterations = sum(s.iterations for s in selected)
+        lines.append(f"{branch:<10} {len(selected):>6} {iterations:>11} {iterations / len(selected):>6.1f} "
+                     f"{max(s.iterations for s in selected):>5} {sum(s.discarded_iterations for s in selected):>10} "
+                     f"{max(abs(s.residual) for s in selected):>10.2e} {sum(s.time for s in selected) * 1000:>9.2f}")
+
+    iterations = sum(s.iterations for s in stats)
+    discarded = sum(s.discarded_iterations for s in stats)
+    lines.append(f"{len(stats)} cards, {iterations} iterations, "
+                 f"{discarded} ({discarded / max(iterations, 1):.1%}) discarded by corner re-fits, "
+                 f"{sum(s.time for s in stats) * 1000:.2f} ms")
+    return "\n".join(lines)
+
+
+def format_histogram(stats, width=50):
+    counts = Counter(s.iterations for s in stats)
+    if not counts:
+        return ""
+    branches = {iterations: Counter(s.branch for s in stats if s.iterations == iterations) for iterations in counts}
+    largest = max(counts.values())
+
+    lines = []
+    for iterations in range(min(counts), max(counts) + 1):
+        count = counts.get(iterations, 0)
+        detail = ", ".join(f"{branch} {n}" for branch, n in sorted(branches.get(iterations, {}).items()))
+        lines.append(f"{iterations:>5} | {'#' * round(width * count / largest):<{width}} {count}"
+                     + (f" ({detail})" if detail else ""))
+    return "\n".join(lines)
+
+
+def save_stats(filename, stats):
+    if filename.endswith(".json"):
+        import json
+
+        with open(filename, 'w', encoding='utf-8') as f:
+            json.dump([s._asdict() for s in stats], f, indent=4)
+    else:
+        import csv
+
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(CardStats._fields)
+            writer.writerows(stats)
+
+
+def plot_histogram(filename, stats):
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=(8, 5))
+    FigureCanvasAgg(figure)
+    ax = figure.add_subplot(111)
+
+    branches = [branch for branch in BRANCHES if any(s.branch == branch for s in stats)]
+    values = [[s.iterations for s in stats if s.branch == branch] for branch in branches]
+    lowest = min((s.iterations for s in stats), default=0)
+    highest = max((s.iterations for s in stats), default=0)
+    ax.hist(values, bins=range(lowest, highest + 2), stacked=True, label=branches, align='left')
+    ax.set_xlabel("iterations per card")
+    ax.set_ylabel("cards")
+    ax.legend()
+    figure.savefig(filename, dpi=100, bbox_inches='tight')
@@ -0,0 +1,100 @@
+import math
+
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.patches import Rectangle, Wedge
+
+
+# when zoomed out, rays closer than this many pixels at the card are thinned out
+RAY_SPACING = 3
+
+
+def in_view(segments, lo, hi):
+    return np.all((segments.min(axis=1) <= hi) & (segments.max(axis=1) >= lo), axis=1)
+
+
+def thin_rays(rays, spacing):
+    direction = rays[:, 0] - rays[:, 1]
+    angle = np.arctan2(direction[:, 1], direction[:, 0])
+    step = spacing / np.median(np.hypot(direction[:, 0], direction[:, 1]))
+    _, first = np.unique(np.floor(angle / step), return_index=True)
+    return np.sort(first)
+
+
+def set_wedge(wedge, focal_spot, radius, theta1, theta2):
+    wedge.set_center((focal_spot.x, focal_spot.y))
+    wedge.set_radius(radius)
+    wedge.set_theta1(math.degrees(theta1))
+    wedge.set_theta2(math.degrees(theta2))
+
+
+class ScannerRenderer:
+    # the artists are created once and only their data is replaced on update, which is much cheaper than clearing the axes
+    def __init__(self, ax):
+        self.ax = ax
+        self.case = ax.add_patch(Rectangle((0, 0), 0, 0, fill=False, edgecolor="grey", lw=1))
+        self.tunnel = ax.add_patch(Rectangle((0, 0), 0, 0, fill=False, edgecolor="black", lw=1))
+        self.tube_fan = ax.add_patch(Wedge((0, 0), 0, 0, 0, color='y', alpha=0.2))
+        self.tube_case = ax.add_patch(Rectangle((0, 0), 0, 0, fill=False, edgecolor="black", lw=1))
+        self.focal_spot, = ax.plot([], [], 'ko')
+        self.array_outline, = ax.plot([], [], color='black')
+        self.plates = ax.add_collection(LineCollection([], colors='navy', lw=1, alpha=0.3), autolim=False)
+        self.rays = ax.add_collection(LineCollection([], colors='k', lw=1, alpha=0.2), autolim=False)
+        self.photodiodes = ax.add_collection(LineCollection([]), autolim=False)
+        self.array_fan = ax.add_patch(Wedge((0, 0), 0, 0, 0, color='c', alpha=0.1))
+        self.card_lines = None
+
+        # zoom and pan of the navigation toolbar change the limits, which selects the level of detail
+        ax.callbacks.connect("xlim_changed", self.update_detail)
+        ax.callbacks.connect("ylim_changed", self.update_detail)
+
+    def update(self, scanner):
+        tube = scanner.tube
+        array = scanner.array
+        ray_length = scanner.ray_length()
+
+        self.case.set_bounds(scanner.case_offset_x, scanner.case_offset_z, scanner.case_size_x, scanner.case_size_z)
+        self.tunnel.set_bounds(scanner.tunnel_offset_x, scanner.tunnel_offset_z,
+                               scanner.tunnel_size_x, scanner.tunnel_size_z)
+
+        set_wedge(self.tube_fan, tube.focal_spot, ray_length, tube.end_angle, tube.start_angle)
+        self.tube_case.set_bounds(tube.offset_x, tube.offset_z, tube.model.size_x, tube.model.size_z)
+        self.tube_case.rotation_point = (tube.offset_x, tube.offset_z)
+        self.tube_case.set_angle(math.degrees(tube.angle))
+        self.focal_spot.set_data([tube.focal_spot.x], [tube.focal_spot.y])
+
+        self.array_outline.set_data(*array.outline())
+        self.card_lines = array.card_lines(tube.focal_spot) + (array.cards.accepted,)
+        set_wedge(self.array_fan, tube.focal_spot, ray_length, array.end_angle, array.start_angle)
+        self.update_detail()
+
+    def pixel_size(self):
+        x0, x1 = self.ax.get_xlim()
+        y0, y1 = self.ax.get_ylim()
+        if self.ax.bbox.width < 1 or self.ax.bbox.height < 1:
+            return 0.0
+        return max(abs(x1 - x0) / self.ax.bbox.width, abs(y1 - y0) / self.ax.bbox.height)
+
+    def update_detail(self, ax=None):
+        if self.card_lines is None:
+            return
+        plates, photodiodes, rays, accepted = self.card_lines
+        x0, x1 = sorted(self.ax.get_xlim())
+        y0, y1 = sorted(self.ax.get_ylim())
+        lo, hi = (x0, y0), (x1, y1)
+        pixel = self.pixel_size()
+
+        visible = in_view(plates, lo, hi)
+        self.photodiodes.set_segments(photodiodes[visible])
+        self.photodiodes.set_color(np.where(accepted[visible], 'b', 'r'))
+
+        # plate outlines thinner than a pixel are hidden by the photodiode line
+        plate_depth = np.hypot(*(plates[:, 1] - plates[:, 0]).T)
+        if len(plates) and np.median(plate_depth) < pixel:
+            visible[:] = False
+        self.plates.set_segments(plates[visible])
+
+        visible_rays = np.flatnonzero(in_view(rays, lo, hi))
+        if len(visible_rays) and pixel > 0:
+            visible_rays = visible_rays[thin_rays(rays[visible_rays], RAY_SPACING * pixel)]
+        self.rays.set_segments(rays[visible_rays])
@@ -1,6 +1,5 @@
-import matplotlib.patches as patches
-
 from .point2d import Point2D
+import copy
 import math
 import json
 from .tube import Tube
@@ -10,11 +9,14 @@ from .arrays import Array
 class Scanner:
     def __init__(self):
         self.tube = Tube()
+        self.applied_configuration = None
+        self.card_model = None
+        self.actual_end = 0
 
     def configure_from_file(self, scanner_file_path):
         self.name = scanner_file_path
-        scanner_file = open(scanner_file_path, 'r')
-        self.config = json.load(scanner_file)
+        with open(scanner_file_path, 'r') as scanner_file:
+            self.config = json.load(scanner_file)
         self.update_configuration()
 
     def update_configuration(self):
@@ -25,39 +27,66 @@ class Scanner:
             json.dump(self.config, scanner_file, indent=4)
 
     def configure(self, configuration):
-        tube_configuration = configuration["tube"]
-        model = tube_configuration["model"]
-        offset_x = float(tube_configuration["offset_x"])
-        offset_z = float(tube_configuration["offset_z"])
-        shift_z = float(tube_configuration["shift_z"])
-        Tube.set_tube_configuration(f"tubes/{model}.json")
-
-        self.tube.place(offset_x, offset_z, shift_z)
-
-        card_configuration = configuration["card"]
-        model = card_configuration["model"]
-        Card.set_card_configuration(f"cards/{model}.json")
+        # compared with the last configuration that was applied completely, so that a failed one is applied again
+        previous = self.applied_configuration
 
-        tunnel_configuration = configuration["tunnel"]
-        self.tunnel_offset_x = float(tunnel_configuration["offset_x"])
-        self.tunnel_offset_z = float(tunnel_configuration["offset_z"])
-        self.tunnel_size_x = float(tunnel_configuration["size_x"])
-        self.tunnel_size_z = float(tunnel_configuration["size_z"])
+        def changed(section, key=None):
+            if previous is None:
+                return True
+            if key is None:
+                return previous[section] != configuration[section]
+            return previous[section][key] != configuration[section][key]
 
-        case_configuration = configuration["case"]
-        self.case_offset_x = float(case_configuration["offset_x"])
-        self.case_offset_z = float(case_configuration["offset_z"])
-        self.case_size_x = float(case_configuration["size_x"])
-        self.case_size_z = float(case_configuration["size_z"])
+        tube_configuration = configuration["tube"]
+        tube_model = Tube.models.get(f"tubes/{tube_configuration['model']}.json")
+        tube_changed = changed("tube") or tube_model is not self.tube.model
+        if tube_changed:
+            offset_x = float(tube_configuration["offset_x"])
+            offset_z = float(tube_configuration["offset_z"])
+            shift_z = float(tube_configuration["shift_z"])
+            self.tube.model = tube_model
 
-        self.array = Array(configuration)
-        self.begin = self.end = self.actual_end = 0
+            self.tube.place(offset_x, offset_z, shift_z)
 
-    def calculate_array(self):
+        card_configuration = configuration["card"]
+        card_model = Card.models.get(f"cards/{card_configuration['model']}.json")
+        card_changed = changed("card") or card_model is not self.card_model
+        self.card_model = card_model
+
+        if changed("tunnel"):
+            tunnel_configuration = configuration["tunnel"]
+            self.tunnel_offset_x = float(tunnel_configuration["offset_x"])
+            self.tunnel_offset_z = float(tunnel_configuration["offset_z"])
+            self.tunnel_size_x = float(tunnel_configuration["size_x"])
+            self.tunnel_size_z = float(tunnel_configuration["size_z"])
+
+        if changed("case"):
+            case_configuration = configuration["case"]
+            self.case_offset_x = float(case_configuration["offset_x"])
+            self.case_offset_z = float(case_configuration["offset_z"])
+            self.case_size_x = float(case_configuration["size_x"])
+            self.case_size_z = float(case_configuration["size_z"])
+
+        # case and tunnel are only drawn, the cards depend on everything else
+        if previous is None:
+            self.array = Array(configuration, card_model)
+        else:
+            if changed("array"):
+                self.array.configure(configuration)
+            if card_changed:
+                self.array.card_model = card_model
+            if tube_changed or card_changed:
+                self.array.invalidate()
+
+        self.applied_configuration = copy.deepcopy(configuration)
+
+    def calculate_array(self, engine="bisection", stats=None):
         if self.array.mode == "compact":
-            self.actual_end = self.array.calculate(self.tube.focal_spot)
+            self.actual_end = self.array.calculate(self.tube.focal_spot, engine, stats)
         elif self.array.mode == "arc":
-            self.actual_end = self.array.calculate_arch(self.tube.focal_spot)
+            if stats is not None:
+                raise ValueError("Card statistics are only collected in compact mode")
+            self.actual_end = self.array.calculate_arch(self.tube.focal_spot, engine)
 
         self.actual_end = math.degrees(self.actual_end)
 
@@ -101,18 +130,19 @@ class Scanner:
 
 
 
-    def plot(self, ax):
+    def ray_length(self):
         top_left = Point2D(self.array.offset_x, self.array.offset_z + self.array.height)
         top_right = Point2D(self.array.offset_x + self.array.length, self.array.offset_z + self.array.height)
 
         top_left_dist = math.dist([self.tube.focal_spot.x, self.tube.focal_spot.y], [top_left.x, top_left.y])
         top_right_dist = math.dist([self.tube.focal_spot.x, self.tube.focal_spot.y], [top_right.x, top_right.y])
 
-        ray_length = max(top_left_dist, top_right_dist)
+        return max(top_left_dist, top_right_dist)
 
-        ax.add_patch(patches.Rectangle((self.case_offset_x, self.case_offset_z), self.case_size_x, self.case_size_z, fill=False, edgecolor ="grey", lw=1))
-        ax.add_patch(patches.Rectangle((self.tunnel_offset_x, self.tunnel_offset_z), self.tunnel_size_x, self.tunnel_size_z, fill=False, edgecolor ="black", lw=1))
+    def plot(self, ax):
+        from .renderer import ScannerRenderer
 
-        self.tube.plot(ax, ray_length)
-        self.array.plot(ax, self.tube.focal_spot, ray_length)
+        renderer = ScannerRenderer(ax)
+        renderer.update(self)
+        return renderer
 
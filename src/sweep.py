@@ -0,0 +1,96 @@
+import copy
+import itertools
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from .batch import initialize_worker
+from .scanner import Scanner
+
+METRICS = ["cards", "rejected", "actual_end", "coverage"]
+
+
+def parse_values(text):
+    if ":" in text:
+        start, stop, count = text.split(":")
+        count = int(count)
+        if count < 2:
+            return [float(start)]
+        step = (float(stop) - float(start)) / (count - 1)
+        return [float(start) + step * i for i in range(count)]
+    return [float(value) for value in text.split(",")]
+
+
+def field_section(configuration, field):
+    *sections, key = field.split(".")
+    for section in sections:
+        configuration = configuration[section]
+    if key not in configuration:
+        raise KeyError(f"Unknown configuration field: {field}")
+    return configuration, key
+
+
+def set_field(configuration, field, value):
+    section, key = field_section(configuration, field)
+    section[key] = value
+
+
+def evaluate_chunk(base_configuration, fields, combinations, engine):
+    scanner = Scanner()
+    configuration = copy.deepcopy(base_configuration)
+    rows = []
+    for values in combinations:
+        try:
+            for field, value in zip(fields, values):
+                set_field(configuration, field, value)
+            scanner.configure(configuration)
+            scanner.calculate_array(engine)
+            cards = scanner.array.cards
+            coverage = math.degrees(scanner.array.start_angle - scanner.array.end_angle)
+            metrics = [len(cards), int((~cards.accepted).sum()), scanner.actual_end, coverage]
+        except Exception as e:
+            rows.append((values, [math.nan] * len(METRICS), f"{type(e).__name__}: {e}"))
+            continue
+
+        rows.append((values, metrics, ""))
+    return rows
+
+
+def sweep(base_configuration, grid, engine="bisection", jobs=None):
+    # tube and card fields vary slowest so that neighbouring combinations share the tube placement and models
+    fields = sorted(grid, key=lambda field: field.split(".")[0] not in ("tube", "card"))
+    for field in fields:
+        # the values are parsed as numbers, so fields like card.model or array.mode cannot be swept
+        section, key = field_section(base_configuration, field)
+        if isinstance(section[key], bool) or not isinstance(section[key], (int, float)):
+            raise ValueError(f"Configuration field {field} is not numeric and cannot be swept")
+    combinations = list(itertools.product(*(grid[field] for field in fields)))
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(combinations) < 2:
+        return fields, evaluate_chunk(base_configuration, fields, combinations, engine)
+
+    chunk_count = min(len(combinations), jobs * 4)
+    chunks = [combinations[len(combinations) * i // chunk_count:len(combinations) * (i + 1) // chunk_count]
+              for i in range(chunk_count)]
+    with ProcessPoolExecutor(jobs, initializer=initialize_worker) as executor:
+        futures = [executor.submit(evaluate_chunk, base_configuration, fields, chunk, engine) for chunk in chunks]
+        return fields, [row for future in futures for row in future.result()]
+
+
+def save_results(filename, fields, rows):
+    if filename.endswith(".npz"):
+        import numpy as np
+
+        columns = {field: np.array([values[i] for values, _, _ in rows]) for i, field in enumerate(fields)}
+        columns.update({metric: np.array([metrics[i] for _, metrics, _ in rows]) for i, metric in enumerate(METRICS)})
+        columns["error"] = np.array([error for _, _, error in rows])
+        np.savez(filename, **columns)
+    else:
+        import csv
+
+        with open(filename, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(fields + METRICS + ["error"])
+            for values, metrics, error in rows:
+                writer.writerow(list(values) + metrics + [error])
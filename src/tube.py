@@ -1,6 +1,5 @@
-import json
 import math
-from matplotlib.patches import Rectangle, Wedge
+from .model_registry import ModelRegistry
 from .point2d import Point2D
 import os
 
@@ -10,37 +9,27 @@ class Tube:
         files = os.listdir("tubes")
         return [os.path.splitext(file)[0] for file in files if file.endswith('.json')]
 
-    @staticmethod
-    def set_tube_configuration(tube_file_path):
-        tube_file = open(tube_file_path, 'r')
-        tube_data = json.load(tube_file)
-        Tube.configure(tube_data)
+    class Model:
+        def __init__(self, configuration):
+            self.size_x = float(configuration["size_x"])
+            self.size_z = float(configuration["size_z"])
+            self.focal_spot_x = float(configuration["focal_spot_x"])
+            self.focal_spot_z = float(configuration["focal_spot_z"])
+            self.start_angle = math.radians(float(configuration["start_angle"]) - 90)
+            self.angle = math.radians(-float(configuration["angle"]))
 
-    @staticmethod
-    def configure(configuration):
-        Tube.size_x = float(configuration["size_x"])
-        Tube.size_z = float(configuration["size_z"])
-        Tube.focal_spot_x = float(configuration["focal_spot_x"])
-        Tube.focal_spot_z = float(configuration["focal_spot_z"])
-        Tube.start_angle = math.radians(float(configuration["start_angle"]) - 90)
-        Tube.angle = math.radians(-float(configuration["angle"]))
+    models = ModelRegistry(Model)
+
+    def __init__(self):
+        self.model = None
 
     def place(self, offset_x, offset_z, bottom):
         self.offset_x = offset_x
         self.offset_z = offset_z
         self.bottom = bottom + offset_z
 
-        self.angle = -math.asin((self.offset_z - self.bottom) / Tube.size_x)
-        self.focal_spot = Point2D(Tube.focal_spot_x, Tube.focal_spot_z).translated(Point2D(self.offset_x, self.offset_z)).rotated(Point2D(self.offset_x, self.offset_z), self.angle)
-
-        self.start_angle = -Tube.start_angle + self.angle
-        self.end_angle = -Tube.start_angle + Tube.angle + self.angle
-
-    def plot(self, ax, ray_length):
-        ax.add_patch(Wedge((self.focal_spot.x, self.focal_spot.y), ray_length, math.degrees(self.end_angle), math.degrees(self.start_angle), color='y', alpha=0.2))
-        ax.add_patch(Rectangle((self.offset_x, self.offset_z), Tube.size_x, Tube.size_z, angle=math.degrees(self.angle), rotation_point=(self.offset_x, self.offset_z), fill=False, edgecolor ="black", lw=1))
-        ax.plot(self.focal_spot.x,self.focal_spot.y,'ko') 
-
-
-
+        self.angle = -math.asin((self.offset_z - self.bottom) / self.model.size_x)
+        self.focal_spot = Point2D(self.model.focal_spot_x, self.model.focal_spot_z).translated(Point2D(self.offset_x, self.offset_z)).rotated(Point2D(self.offset_x, self.offset_z), self.angle)
 
+        self.start_angle = -self.model.start_angle + self.angle
+        self.end_angle = -self.model.start_angle + self.model.angle + self.angle
@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# importing the geometry core takes about 20-30 ms, importing matplotlib alone takes several times the budget
+IMPORT_BUDGET = 0.05
+HEAVY_MODULES = ["matplotlib", "PySide6", "numpy"]
+
+SCRIPT = f"""
+import json
+import sys
+import time
+
+t0 = time.perf_counter()
+import src.scanner
+elapsed = time.perf_counter() - t0
+print(json.dumps({{"time": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def import_scanner():
+    output = subprocess.run([sys.executable, "-c", SCRIPT], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_scanner_does_not_import_heavy_modules():
+    assert import_scanner()["loaded"] == []
+
+
+def test_scanner_import_time():
+    # the best of a few runs, a single one is easily slowed down by other processes
+    best = min(import_scanner()["time"] for _ in range(5))
+    assert best < IMPORT_BUDGET, f"importing src.scanner took {best * 1000:.1f} ms"
@@ -0,0 +1,192 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SIMULATION_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "simulation")
+if SIMULATION_DIR not in sys.path:
+    sys.path.append(SIMULATION_DIR)
+
+import sim
+from phantoms import BoxGeometry, CylinderGeometry, PhantomScene, SphereGeometry, WireGridGeometry
+
+DETECTOR_RESOLUTION = 16
+
+
+def arc_detectors(count=24, radius=600.0, width=30.0):
+    # a fan of flat panels around the focal spot at the origin, like an arc array
+    step = 2 * np.arcsin(width / (2 * radius))
+    edges = np.pi / 2 + step * (np.arange(count + 1) - count / 2)
+    points = np.column_stack((radius * np.cos(edges), radius * np.sin(edges)))
+    return [[list(points[i]), list(points[i + 1])] for i in range(count)]
+
+
+def sawtooth_detectors(count=12, width=30.0, tilt=8.0):
+    # panels tilted towards the focal spot, each one hides the near edge of the next one
+    return [[[-200.0 + 25.0 * i, 500.0], [-200.0 + 25.0 * i + width, 500.0 - tilt]] for i in range(count)]
+
+
+def rays(count, seed=0):
+    rng = np.random.default_rng(seed)
+    S = rng.uniform(-150, 150, (count, 3))
+    P = rng.uniform(-150, 150, (count, 3))
+    return S, P
+
+
+def dense_length(inside, S, P, samples=20000):
+    # midpoint rule along every ray, the error is at most one sample length per boundary crossing
+    t = (np.arange(samples) + 0.5) / samples
+    points = S[:, None] + (P - S)[:, None] * t[:, None]
+    return inside(points).mean(axis=1) * np.linalg.norm(P - S, axis=1)
+
+
+def inside_sphere(center, radius):
+    return lambda points: np.sum((points - center) ** 2, axis=-1) <= radius ** 2
+
+
+def inside_box(lo, hi):
+    return lambda points: np.all((points >= lo) & (points <= hi), axis=-1)
+
+
+def inside_cylinder(center, radius, length, axis, across):
+    def inside(points):
+        offset = points[..., across] - center[across]
+        return ((np.einsum("...i,...i", offset, offset) <= radius ** 2) &
+                (np.abs(points[..., axis] - center[axis]) <= length / 2))
+    return inside
+
+
+def inside_wire_grid(grid):
+    wires = [inside_cylinder(wire.center, wire.radius, wire.length, wire.axis, wire.across) for wire in grid.wires]
+    return lambda points: np.any([inside(points) for inside in wires], axis=0)
+
+
+sphere = SphereGeometry(np.array([10.0, -5.0, 20.0]), 60.0)
+box = BoxGeometry(np.array([-60.0, -40.0, -20.0]), np.array([50.0, 30.0, 70.0]))
+cylinder_y = CylinderGeometry(np.array([0.0, 10.0, 0.0]), 50.0, 120.0, "y")
+cylinder_x = CylinderGeometry(np.array([5.0, 0.0, -10.0]), 40.0, 200.0, "x")
+wire_grid = WireGridGeometry(np.array([0.0, 0.0, 0.0]), 8.0, 150.0, 5, 30.0, "y", "x")
+
+# every phantom with an independent point-in-object test
+GEOMETRIES = {
+    "sphere": (sphere, inside_sphere(sphere.center, sphere.radius)),
+    "box": (box, inside_box(box.lo, box.hi)),
+    "cylinder_y": (cylinder_y, inside_cylinder(cylinder_y.center, cylinder_y.radius, cylinder_y.length, 1, [0, 2])),
+    "cylinder_x": (cylinder_x, inside_cylinder(cylinder_x.center, cylinder_x.radius, cylinder_x.length, 0, [1, 2])),
+    "wire_grid": (wire_grid, inside_wire_grid(wire_grid)),
+}
+
+
+@pytest.mark.parametrize("name", GEOMETRIES)
+def test_phantom_matches_dense_sampling(name):
+    geometry, inside = GEOMETRIES[name]
+    S, P = rays(400)
+
+    expected = dense_length(inside, S, P)
+    result = geometry.intersect_length_batch(S, P)
+
+    assert np.count_nonzero(expected) > 20
+    tolerance = 2 * np.linalg.norm(P - S, axis=1) / 20000
+    if name == "wire_grid":
+        tolerance *= len(geometry.wires)
+    np.testing.assert_array_less(np.abs(result - expected), tolerance + 1e-9)
+
+
+def test_sphere_batch_matches_single_ray():
+    geometry, _ = GEOMETRIES["sphere"]
+    S, P = rays(200, seed=1)
+    expected = [geometry.intersect_length(s, p) for s, p in zip(S, P)]
+    np.testing.assert_allclose(geometry.intersect_length_batch(S, P), expected, rtol=1e-12, atol=1e-9)
+
+
+def test_scene_culling_matches_every_geometry():
+    geometries = [geometry for geometry, _ in GEOMETRIES.values()]
+    # a few small objects far from most rays, so that the culling skips some of them
+    geometries += [SphereGeometry(np.array([120.0 * i, 0.0, 140.0]), 5.0) for i in range(-1, 2)]
+    S, P = rays(2000, seed=2)
+
+    expected = sum(geometry.intersect_length_batch(S, P) for geometry in geometries)
+    np.testing.assert_allclose(PhantomScene(geometries).intersect_length_batch(S, P), expected, rtol=1e-12, atol=1e-9)
+
+
+def sphere_scene():
+    return [SphereGeometry(np.array([0.0, 0.0, 300.0]), 150.0)]
+
+
+@pytest.mark.parametrize("y", [-250.0, -40.0, 0.0, 75.0])
+def test_process_row_matches_per_ray(y, monkeypatch):
+    # small blocks, so that a row is split into several of them
+    monkeypatch.setattr(sim, "RAY_BLOCK_BYTES", 1024)
+    geometries = sphere_scene()
+    focal_spot = np.array([0.0, 0.0, 0.0])
+    points = sim.sample_detector_points(arc_detectors(), DETECTOR_RESOLUTION)
+
+    _, expected = sim.process_row_per_ray((geometries, 3, focal_spot, points, y))
+    i, row = sim.process_row((geometries, 3, focal_spot, points, y, np.float64))
+
+    assert i == 3
+    if y == 0.0:
+        assert np.count_nonzero(row) > len(row) // 2
+    np.testing.assert_allclose(row, expected, rtol=1e-12, atol=1e-9)
+
+
+def test_intersect_row_block_bytes():
+    geometries = sphere_scene()
+    focal_spot = np.array([0.0, 0.0, 0.0])
+    points = sim.sample_detector_points(arc_detectors(), DETECTOR_RESOLUTION)
+    S, P = sim.ray_ends(focal_spot, points, 0.0)
+
+    expected = sim.intersect_row(geometries, S, P, np.empty(len(P)))
+    # blocks of 5 rays, which do not divide the row
+    row = sim.intersect_row(geometries, S, P, np.empty(len(P)), block_bytes=5 * 3 * 8)
+
+    np.testing.assert_array_equal(row, expected)
+
+
+def test_process_row_float32():
+    geometries = [geometry.astype(np.float32) for geometry in sphere_scene()]
+    focal_spot = np.array([0.0, 0.0, 0.0])
+    points = sim.sample_detector_points(arc_detectors(), DETECTOR_RESOLUTION)
+
+    _, expected = sim.process_row_per_ray((sphere_scene(), 0, focal_spot, points, 10.0))
+    _, row = sim.process_row((geometries, 0, focal_spot, points, 10.0, np.float32))
+
+    assert row.dtype == np.float32
+    # float32 loses accuracy on rays that graze the sphere, see the precision option
+    np.testing.assert_allclose(row, expected, atol=1e-3 * 2 * 150.0)
+
+
+@pytest.mark.parametrize("detectors", [sawtooth_detectors(), sawtooth_detectors(tilt=-8.0), arc_detectors()],
+                         ids=["sawtooth", "reversed", "arc"])
+def test_occlusion_matches_per_pixel(detectors):
+    focal_spot = np.array([0.0, 0.0, 0.0])
+    points = sim.sample_detector_points(detectors, DETECTOR_RESOLUTION)
+
+    expected = sim.calculate_occlusion_per_pixel(detectors, points, 1, DETECTOR_RESOLUTION, focal_spot)[0] == 1
+    result = sim.calculate_occlusion(detectors, points, DETECTOR_RESOLUTION, focal_spot)
+
+    np.testing.assert_array_equal(result, expected)
+
+
+def test_occlusion_is_found():
+    detectors = sawtooth_detectors()
+    points = sim.sample_detector_points(detectors, DETECTOR_RESOLUTION)
+    occlusion = sim.calculate_occlusion(detectors, points, DETECTOR_RESOLUTION, np.array([0.0, 0.0, 0.0]))
+    assert 0 < np.count_nonzero(occlusion) < len(occlusion)
+
+
+@pytest.mark.parametrize("shape", [(1000, 900), (37, 41), (8, 8)])
+def test_downsample_keeps_block_maximum(shape):
+    projection = np.random.default_rng(3).uniform(0, 1, shape)
+    # a wire one pixel wide, which striding would skip
+    projection[:, 5] = 10.0
+
+    image = sim.downsample_projection(projection, max_size=10)
+
+    row_step, column_step = -(-shape[0] // 10), -(-shape[1] // 10)
+    padded = np.full((image.shape[0] * row_step, image.shape[1] * column_step), -np.inf)
+    padded[:shape[0], :shape[1]] = projection
+    expected = padded.reshape(image.shape[0], row_step, image.shape[1], column_step).max(axis=(1, 3))
+    np.testing.assert_array_equal(image, expected)
+    assert np.all(image[:, 5 // column_step] == 10.0)